@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Single-flight module for the API.
+"""
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    """In-flight call of a SingleFlight.
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        """Initializes a new pending call.
+        """
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key.
+
+    The first caller of a key runs the function; callers arriving while
+    it runs wait and get its result, or its exception. Nothing is kept
+    once the call returns, so this is not a cache.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new SingleFlight instance.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args: Any) -> Any:
+        """Runs func(*args), or waits for the call in flight for key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Response compression module for the API.
+"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from os import getenv
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson')
+# zlib wbits of the compressobj for each content coding.
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def _int_env(name: str, default: int) -> int:
+    """Returns an integer setting of the environment.
+    """
+    try:
+        return int(getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Returns the content coding to use for an Accept-Encoding header,
+    gzip before deflate when both are equally acceptable, or None.
+    """
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding.strip().lower()] = weight
+    best = None
+    for coding in ('gzip', 'deflate'):
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+class ResponseCompressor:
+    """Response compression class.
+
+    Compresses JSON and text responses with gzip or deflate, as
+    negotiated from Accept-Encoding, once they reach COMPRESS_MIN_SIZE
+    bytes. Streamed responses are compressed chunk by chunk. The
+    compressed bodies of GET responses are kept in a small LRU cache
+    keyed by a digest of the body, so an unchanged payload is only
+    compressed once.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new ResponseCompressor from the environment.
+        """
+        self.level = min(max(_int_env('COMPRESS_LEVEL', 6), 0), 9)
+        self.min_size = _int_env('COMPRESS_MIN_SIZE', 500)
+        self.cache_size = _int_env('COMPRESS_CACHE_SIZE', 64)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """Compresses the responses of an app.
+        """
+        if self.level > 0:
+            app.after_request(self.compress)
+
+    def _compressible(self, response: Response) -> bool:
+        """Checks if a response may be compressed.
+        """
+        if request.method == 'HEAD' or response.status_code in (204, 304):
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or \
+            mimetype in COMPRESSIBLE_TYPES
+
+    def compress(self, response: Response) -> Response:
+        """Compresses a response if the client accepts it.
+        """
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        coding = negotiate(request.headers.get('Accept-Encoding'))
+        if coding is None:
+            return response
+        if response.is_streamed:
+            response.response = self._stream(response.response, coding)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self._compressed(data, coding, response))
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def _compressed(self, data: bytes, coding: str,
+                    response: Response) -> bytes:
+        """Returns a body compressed, from the cache when possible.
+        """
+        cacheable = self.cache_size > 0 and request.method == 'GET' and \
+            response.status_code == 200 and \
+            not response.cache_control.no_store
+        if not cacheable:
+            return self._encode(data, coding)
+        key = (coding, hashlib.blake2b(data, digest_size=16).digest())
+        with self._cache_lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+        body = self._encode(data, coding)
+        with self._cache_lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def _encode(self, data: bytes, coding: str) -> bytes:
+        """Compresses a whole body.
+        """
+        if coding == 'gzip':
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        return zlib.compress(data, self.level)
+
+    def _stream(self, chunks: Iterable[bytes], coding: str
+                ) -> Iterator[bytes]:
+        """Compresses a streamed body chunk by chunk.
+        """
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED,
+                                      WBITS[coding])
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
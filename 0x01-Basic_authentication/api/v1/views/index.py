@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import jsonify, abort, Response
+from api.v1.metrics import render
 from api.v1.views import app_views
 
 
@@ -22,10 +23,19 @@ def stats() -> str:
     """
     from models.user import User
     stats = {}
-    stats['users'] = User.count()
+    stats['users'] = len(User.snapshot())
     return jsonify(stats)
 
 
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> str:
+    """ GET /api/v1/metrics
+    Return:
+      - the latency histograms in the Prometheus text format
+    """
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
 @app_views.route('/unauthorized/', strict_slashes=False)
 def unauthorized() -> None:
     """GET /api/v1/unauthorized
@@ -12,7 +12,7 @@ def view_all_users() -> str:
     Return:
       - list of all User objects JSON represented
     """
-    all_users = [user.to_json() for user in User.all()]
+    all_users = [user.to_json() for user in User.snapshot().values()]
     return jsonify(all_users)
 
 
@@ -61,7 +61,8 @@ def create_user() -> str:
       - first_name (optional)
     Return:
       - User object JSON represented
-      - 400 if can't create the new User
+      - 400 if can't create the new User, or if the email is already
+        registered in any letter case
     """
     rj = None
     error_msg = None
@@ -75,6 +76,8 @@ def create_user() -> str:
         error_msg = "email missing"
     if error_msg is None and rj.get("password", "") == "":
         error_msg = "password missing"
+    if error_msg is None and User.search({'email': rj.get("email")}):
+        error_msg = "email already exists"
     if error_msg is None:
         try:
             user = User()
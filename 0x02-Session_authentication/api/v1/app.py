@@ -4,26 +4,61 @@ Route module for the API
 """
 from os import getenv
 from api.v1.views import app_views
-from flask import Flask, jsonify, abort, request
+from flask import Flask, jsonify, abort, request, g
 from flask_cors import (CORS, cross_origin)
+from importlib import import_module
 import os
-from api.v1.auth.auth import Auth
-from api.v1.auth.basic_auth import BasicAuth
-from api.v1.auth.session_auth import SessionAuth
-from api.v1.auth.session_db_auth import SessionDBAuth
-from api.v1.auth.session_exp_auth import SessionExpAuth
+import time
+from api.v1.compression import ResponseCompressor
+from api.v1.memory import start_tracing
+from api.v1.metrics import REQUEST_SECONDS
+from api.v1.profiler import RequestProfiler
 
 
 app = Flask(__name__)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
+ResponseCompressor().init_app(app)
+RequestProfiler().init_app(app, '/api/v1/profiler')
+start_tracing()
 
-auth = None
-auth_type = getenv('AUTH_TYPE', 'auth')
-if auth_type == 'auth':
-    auth = Auth()
-if auth_type == 'basic_auth':
-    auth = BasicAuth()
+AUTH_BACKENDS = {
+    'auth': ('api.v1.auth.auth', 'Auth'),
+    'basic_auth': ('api.v1.auth.basic_auth', 'BasicAuth'),
+    'session_auth': ('api.v1.auth.session_auth', 'SessionAuth'),
+    'session_exp_auth': ('api.v1.auth.session_exp_auth',
+                         'SessionExpAuth'),
+    'session_db_auth': ('api.v1.auth.session_db_auth', 'SessionDBAuth'),
+    'session_token_auth': ('api.v1.auth.session_token_auth',
+                           'SessionTokenAuth'),
+}
+
+
+def load_auth(auth_type: str):
+    """Imports only the authentication backend of a type and returns
+    an instance of it.
+    """
+    backend = AUTH_BACKENDS.get(auth_type)
+    if backend is None:
+        return None
+    module_name, class_name = backend
+    return getattr(import_module(module_name), class_name)()
+
+
+def warmup() -> None:
+    """Loads the object stores and starts the authentication backend
+    before the first request needs them.
+    """
+    from models.user import User
+    User.ensure_loaded()
+    if auth is not None:
+        auth.warmup()
+
+
+auth = load_auth(getenv('AUTH_TYPE', 'auth'))
+# Views read the backend from the config of the app serving them: under
+# `python -m api.v1.app` importing api.v1.app would build a second one.
+app.config['AUTH'] = auth
 
 
 @app.errorhandler(404)
@@ -46,6 +81,36 @@ def forbidden(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+@app.errorhandler(429)
+def too_many_requests(error) -> str:
+    """Too many requests handler.
+    """
+    return jsonify({"error": "Too many requests"}), 429
+
+
+@app.before_request
+def start_timer():
+    """Starts timing the request.
+    """
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+    """Records the request latency by route and status.
+    """
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route,
+            str(response.status_code),
+        )
+    return response
+
+
 @app.before_request
 def authenticate_user():
     """
@@ -56,20 +121,24 @@ def authenticate_user():
             '/api/v1/status/',
             '/api/v1/unauthorized/',
             '/api/v1/forbidden/',
+            '/api/v1/metrics/',
+            '/api/v1/profiler/',
+            '/api/v1/memory/',
             '/api/v1/auth_session/login/',
         ]
         if auth.require_auth(request.path, excluded_paths):
             auth_header = auth.authorization_header(request)
             sess_cookie = auth.session_cookie(request)
             user = auth.current_user(request)
-            if auth_header is None and auth.session_cookie(request) is None:
+            if auth_header is None and sess_cookie is None:
                 abort(401)
-            if request.current_user is None:
+            if user is None:
                 abort(403)
-            request.current_user = auth.current_user(request)
+            request.current_user = user
 
 
 if __name__ == "__main__":
     host = getenv("API_HOST", "0.0.0.0")
     port = getenv("API_PORT", "5000")
+    warmup()
     app.run(host=host, port=port)
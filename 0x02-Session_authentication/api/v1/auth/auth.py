@@ -38,6 +38,15 @@ class Auth:
         """
         return None
 
+    def warmup(self) -> None:
+        """Starts the background work of the backend, if any.
+        """
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Destroys every session of a user.
+        """
+        return 0
+
     def session_cookie(self, request=None):
         """
         function that Returns a cookie session from a request
@@ -50,4 +59,4 @@ class Auth:
         if session_name is None:
             return None
 
-        return request.cookie.get(session_name)
+        return request.cookies.get(session_name)
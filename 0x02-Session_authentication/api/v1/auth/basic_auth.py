@@ -4,15 +4,23 @@
 import re
 import base64
 import binascii
+import hashlib
+import hmac
+import secrets
 from typing import Tuple, TypeVar
 
 from .auth import Auth
+from .single_flight import SingleFlight
+from api.v1.metrics import timed
 from models.user import User
 
 
 class BasicAuth(Auth):
     """Basic authentication class.
     """
+    _flights = SingleFlight()
+    _flight_key = secrets.token_bytes(32)
+
     def extract_base64_authorization_header(
             self,
             authorization_header: str) -> str:
@@ -69,20 +77,38 @@ class BasicAuth(Auth):
         """
         if type(user_email) == str and type(user_pwd) == str:
             try:
-                users = User.search({'email': user_email})
+                with timed('user_lookup'):
+                    users = User.search({'email': user_email})
             except Exception:
                 return None
-            if len(users) <= 0:
-                return None
-            if users[0].is_valid_password(user_pwd):
-                return users[0]
+            users.sort(key=lambda user: user.email != user_email)
+            with timed('password_verify'):
+                for user in users:
+                    if user.is_valid_password(user_pwd):
+                        return user
         return None
 
     def current_user(self, request=None) -> TypeVar('User'):
         """Retrieves the user from a request.
+
+        Concurrent requests with the same Authorization header share a
+        single verification, keyed by an HMAC of the header so the
+        credentials themselves are never kept.
         """
         auth_header = self.authorization_header(request)
-        b64_auth_token = self.extract_base64_authorization_header(auth_header)
-        auth_token = self.decode_base64_authorization_header(b64_auth_token)
-        email, password = self.extract_user_credentials(auth_token)
+        if not isinstance(auth_header, str):
+            return None
+        key = hmac.new(self._flight_key, auth_header.encode('utf-8'),
+                       hashlib.sha256).digest()
+        return self._flights.do(key, self.user_from_header, auth_header)
+
+    def user_from_header(self, auth_header: str) -> TypeVar('User'):
+        """Retrieves the user from a Basic Authorization header.
+        """
+        with timed('header_parse'):
+            b64_auth_token = self.extract_base64_authorization_header(
+                auth_header)
+            auth_token = self.decode_base64_authorization_header(
+                b64_auth_token)
+            email, password = self.extract_user_credentials(auth_token)
         return self.user_object_from_credentials(email, password)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Login rate limiting module for the API.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class RateLimiter:
+    """Token-bucket rate limiter class.
+
+    Every key gets a bucket of `burst` tokens refilled at `rate` tokens
+    per second; a call is allowed when a whole token is available. Only
+    the `max_keys` most recently used buckets are kept, so memory stays
+    bounded whatever the number of clients.
+    """
+
+    def __init__(self, rate: float, burst: float,
+                 max_keys: int = 100000) -> None:
+        """Initializes a new RateLimiter, disabled when rate <= 0.
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_keys = max(1, max_keys)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        """Takes a token from the bucket of a key, returning False
+        when the call is throttled.
+        """
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens, last = bucket
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+
+def _env_float(name: str, default: float) -> float:
+    """Reads a number from the environment.
+    """
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def login_limiters() -> Tuple[RateLimiter, RateLimiter]:
+    """Builds the per client IP and per email login limiters from
+    LOGIN_IP_RATE / LOGIN_IP_BURST, LOGIN_EMAIL_RATE / LOGIN_EMAIL_BURST
+    and LOGIN_LIMITER_KEYS.
+    """
+    max_keys = int(_env_float("LOGIN_LIMITER_KEYS", 100000))
+    by_ip = RateLimiter(
+        _env_float("LOGIN_IP_RATE", 1.0),
+        _env_float("LOGIN_IP_BURST", 10),
+        max_keys,
+    )
+    by_email = RateLimiter(
+        _env_float("LOGIN_EMAIL_RATE", 0.2),
+        _env_float("LOGIN_EMAIL_BURST", 5),
+        max_keys,
+    )
+    return by_ip, by_email
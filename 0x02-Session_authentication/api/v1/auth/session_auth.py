@@ -1,21 +1,33 @@
 #!/usr/bin/env python3
 """Empty Session authentication"""
 
+from os import getenv
+from typing import Set
 from uuid import uuid4
 
+from api.v1.metrics import timed
 from models.user import User
 from .auth import Auth
+from .session_store import ShardedMap
+
+
+try:
+    SESSION_SHARDS = int(getenv('SESSION_SHARDS', '16'))
+except ValueError:
+    SESSION_SHARDS = 16
 
 
 class SessionAuth(Auth):
     """Session authentication class"""
-    user_id_by_session_id = {}
+    user_id_by_session_id = ShardedMap(SESSION_SHARDS)
+    session_ids_by_user_id = ShardedMap(SESSION_SHARDS)
 
     def create_session(self, user_id: str = None) -> str:
         """creates a Session ID for a user_id"""
         if user_id and isinstance(user_id, str):
             session_id = str(uuid4())
             self.user_id_by_session_id[session_id] = user_id
+            self._index_user_session(session_id, user_id)
             return session_id
         return None
 
@@ -27,8 +39,12 @@ class SessionAuth(Auth):
 
     def current_user(self, request=None):
         """returns a User instance based on a cookie value"""
-        user_id = self.user_id_for_session_id(self.session_cookie(request))
-        return User.get(user_id)
+        with timed('header_parse'):
+            session_id = self.session_cookie(request)
+        with timed('session_lookup'):
+            user_id = self.user_id_for_session_id(session_id)
+        with timed('user_lookup'):
+            return User.get(user_id)
 
     def destroy_session(self, request=None):
         """Destroys an authenticated session.
@@ -37,6 +53,33 @@ class SessionAuth(Auth):
         user_id = self.user_id_for_session_id(session_id)
         if (request is None or session_id is None) or user_id is None:
             return False
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
+        self._remove_session(session_id)
+        return True
+
+    def sessions_for(self, user_id: str = None) -> Set[str]:
+        """returns the Session IDs of a user"""
+        return self.session_ids_by_user_id.members(user_id)
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Destroys every session of a user.
+        """
+        session_ids = self.sessions_for(user_id)
+        return sum(map(self._remove_session, session_ids))
+
+    def _index_user_session(self, session_id: str, user_id: str) -> None:
+        """Adds a Session ID to the sessions of its user.
+        """
+        self.session_ids_by_user_id.add_member(user_id, session_id)
+
+    def _remove_session(self, session_id: str) -> bool:
+        """Removes a session and its entry in the sessions of its user.
+        """
+        session = self.user_id_by_session_id.pop(session_id, None)
+        if session is None:
+            return False
+        if isinstance(session, dict):
+            user_id = session.get('user_id')
+        else:
+            user_id = session
+        self.session_ids_by_user_id.discard_member(user_id, session_id)
         return True
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Session authentication with expiration
+and storage support module for the API.
+"""
+import atexit
+import threading
+from os import getenv
+
+from models.user_session import UserSession
+from .session_exp_auth import SessionExpAuth
+
+
+class SessionDBAuth(SessionExpAuth):
+    """Session authentication class with expiration and storage support.
+
+    Sessions are served from the in-process index inherited from
+    SessionExpAuth, which is warmed from the UserSession store by
+    warmup(), or on first use of the sessions. Creates and destroys are
+    buffered and written behind in batches, so a login does not rewrite
+    the store file on its own.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new SessionDBAuth instance.
+        """
+        super().__init__()
+        try:
+            self.flush_size = int(getenv('SESSION_FLUSH_SIZE', '100'))
+        except ValueError:
+            self.flush_size = 100
+        try:
+            self.flush_interval = float(
+                getenv('SESSION_FLUSH_INTERVAL', '1'))
+        except ValueError:
+            self.flush_interval = 1.0
+        self._pending = {}
+        self._persisted = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_wanted = threading.Event()
+
+    def _start(self) -> None:
+        """Loads the stored sessions, then starts the expiry sweeper
+        and the write-behind flusher.
+        """
+        self.load_sessions()
+        super()._start()
+        flusher = threading.Thread(
+            target=self._flush_forever,
+            name='session-flusher',
+            daemon=True,
+        )
+        flusher.start()
+        atexit.register(self.flush)
+
+    def load_sessions(self) -> None:
+        """Warms the in-process session index from the storage.
+        """
+        UserSession.load_from_file()
+        user_sessions = sorted(UserSession.all(), key=lambda s: s.created_at)
+        for user_session in user_sessions:
+            self._persisted[user_session.session_id] = user_session
+            self._index_session(
+                user_session.session_id,
+                user_session.user_id,
+                user_session.created_at,
+            )
+        self.evict_expired_sessions()
+
+    def create_session(self, user_id: str = None) -> str:
+        """Creates and stores a session id for the user.
+        """
+        session_id = super().create_session(user_id)
+        if session_id is None:
+            return None
+        created_at = self.user_id_by_session_id[session_id]['created_at']
+        user_session = UserSession(
+            user_id=user_id,
+            session_id=session_id,
+        )
+        user_session.created_at = created_at
+        self._enqueue(session_id, user_session)
+        return session_id
+
+    def flush(self) -> int:
+        """Writes every buffered session change to the storage
+        in a single batch.
+
+        Returns:
+        - int: The number of session changes written.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            created, removed = [], []
+            for session_id, user_session in pending.items():
+                if user_session is not None:
+                    self._persisted[session_id] = user_session
+                    created.append(user_session)
+                elif session_id in self._persisted:
+                    removed.append(self._persisted.pop(session_id))
+            UserSession.save_many(created, removed)
+            return len(pending)
+
+    def _index_session(self, session_id: str, user_id: str,
+                       created_at) -> None:
+        """Adds a stored session to the in-process index.
+        """
+        self.user_id_by_session_id[session_id] = {
+            'user_id': user_id,
+            'created_at': created_at,
+        }
+        self._index_user_session(session_id, user_id)
+        self._track_expiry(session_id, created_at)
+
+    def _remove_session(self, session_id: str) -> bool:
+        """Removes a session from the index and the storage.
+        """
+        removed = super()._remove_session(session_id)
+        if removed:
+            self._enqueue(session_id, None)
+        return removed
+
+    def _enqueue(self, session_id: str, user_session: UserSession) -> None:
+        """Buffers a session creation, or a removal when
+        user_session is None.
+        """
+        with self._pending_lock:
+            if user_session is None and \
+                    self._pending.get(session_id) is not None:
+                del self._pending[session_id]
+            else:
+                self._pending[session_id] = user_session
+            buffered = len(self._pending)
+        if buffered >= self.flush_size:
+            self._flush_wanted.set()
+
+    def _flush_forever(self) -> None:
+        """Flushes buffered session changes in the background.
+        """
+        while True:
+            self._flush_wanted.wait(self.flush_interval)
+            self._flush_wanted.clear()
+            self.flush()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Session authentication with expiration module for the API.
+"""
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Set
+
+from .session_auth import SessionAuth
+
+
+class SessionExpAuth(SessionAuth):
+    """Session authentication class with expiration.
+
+    Every session lives for the same ``SESSION_DURATION`` seconds, so
+    sessions expire in the order they were created. Expiry deadlines are
+    kept in a FIFO queue and evicted from its head, which makes both
+    registration and eviction O(1) amortized. The sweeper thread starts
+    with warmup(), or on first use of the sessions, not on creation.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new SessionExpAuth instance.
+        """
+        super().__init__()
+        try:
+            self.session_duration = int(getenv('SESSION_DURATION', '0'))
+        except ValueError:
+            self.session_duration = 0
+        try:
+            self.sweep_interval = int(getenv('SESSION_SWEEP_INTERVAL', '60'))
+        except ValueError:
+            self.sweep_interval = 60
+        self._expiry_queue = deque()
+        self._expiry_lock = threading.Lock()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def warmup(self) -> None:
+        """Starts the background work of the backend, once.
+        """
+        if self._started:
+            return
+        with self._start_lock:
+            if not self._started:
+                self._start()
+                self._started = True
+
+    def _start(self) -> None:
+        """Starts the expiry sweeper.
+        """
+        if self.session_duration > 0 and self.sweep_interval > 0:
+            sweeper = threading.Thread(
+                target=self._sweep_forever,
+                name='session-sweeper',
+                daemon=True,
+            )
+            sweeper.start()
+
+    def create_session(self, user_id: str = None) -> str:
+        """Creates a session id for the user.
+        """
+        self.warmup()
+        session_id = super().create_session(user_id)
+        if session_id is None:
+            return None
+        created_at = datetime.utcnow()
+        self.user_id_by_session_id[session_id] = {
+            'user_id': user_id,
+            'created_at': created_at,
+        }
+        self._track_expiry(session_id, created_at)
+        self.evict_expired_sessions()
+        return session_id
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """Retrieves the user id of the user associated with
+        a given session id, dropping the session if it has expired.
+        """
+        if session_id is None or not isinstance(session_id, str):
+            return None
+        self.warmup()
+        session_dict = self.user_id_by_session_id.get(session_id)
+        if session_dict is None:
+            return None
+        if self.session_duration <= 0:
+            return session_dict.get('user_id')
+        created_at = session_dict.get('created_at')
+        if created_at is None:
+            return None
+        expires_at = created_at + timedelta(seconds=self.session_duration)
+        if expires_at < datetime.utcnow():
+            self._remove_session(session_id)
+            return None
+        return session_dict.get('user_id')
+
+    def sessions_for(self, user_id: str = None) -> Set[str]:
+        """returns the Session IDs of a user"""
+        self.warmup()
+        return super().sessions_for(user_id)
+
+    def evict_expired_sessions(self) -> int:
+        """Removes every expired session from the store.
+
+        Returns:
+        - int: The number of sessions evicted.
+        """
+        now = datetime.utcnow()
+        evicted = 0
+        with self._expiry_lock:
+            while self._expiry_queue and self._expiry_queue[0][0] < now:
+                _, session_id = self._expiry_queue.popleft()
+                if self._remove_session(session_id):
+                    evicted += 1
+        return evicted
+
+    def _track_expiry(self, session_id: str, created_at: datetime) -> None:
+        """Queues the expiry deadline of a session for the sweeper.
+        """
+        if self.session_duration <= 0:
+            return
+        expires_at = created_at + timedelta(seconds=self.session_duration)
+        with self._expiry_lock:
+            self._expiry_queue.append((expires_at, session_id))
+
+    def _sweep_forever(self) -> None:
+        """Periodically evicts expired sessions in the background.
+        """
+        stop = threading.Event()
+        while not stop.wait(self.sweep_interval):
+            self.evict_expired_sessions()
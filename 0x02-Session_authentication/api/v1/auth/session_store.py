@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Session store module for the API.
+"""
+import threading
+from typing import Any, Dict, Hashable, Iterator, List, Set, Tuple
+
+
+class ShardedMap:
+    """Lock-striped map used to store sessions.
+
+    Keys are spread over several shards by hash, and every shard has its
+    own lock, so concurrent logins and logouts only contend when they
+    land on the same shard.
+    """
+
+    def __init__(self, shard_count: int = 16) -> None:
+        """Initializes a new ShardedMap instance.
+        """
+        self.shard_count = max(1, shard_count)
+        self._shards = [{} for _ in range(self.shard_count)]
+        self._locks = [threading.Lock() for _ in range(self.shard_count)]
+
+    def _shard(self, key: Hashable) -> Tuple[dict, threading.Lock]:
+        """Returns the shard holding a key and its lock.
+        """
+        index = hash(key) % self.shard_count
+        return self._shards[index], self._locks[index]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value of a key, or default if it is missing.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.get(key, default)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Removes a key and returns its value, or default
+        if it is missing.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.pop(key, default)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        """Returns the value of a key.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return shard[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        """Sets the value of a key.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            shard[key] = value
+
+    def __delitem__(self, key: Hashable) -> None:
+        """Removes a key.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            del shard[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Checks if a key is stored.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return key in shard
+
+    def __len__(self) -> int:
+        """Returns the number of keys stored.
+        """
+        return sum(map(len, self._shards))
+
+    def __iter__(self) -> Iterator[Hashable]:
+        """Iterates over a snapshot of the keys.
+        """
+        return iter(self.snapshot())
+
+    def add_member(self, key: Hashable, member: Hashable) -> None:
+        """Adds a member to the set stored at a key.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            shard.setdefault(key, set()).add(member)
+
+    def discard_member(self, key: Hashable, member: Hashable) -> None:
+        """Removes a member from the set stored at a key, and the key
+        once its set is empty.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            members = shard.get(key)
+            if members is not None:
+                members.discard(member)
+                if not members:
+                    del shard[key]
+
+    def members(self, key: Hashable) -> Set[Hashable]:
+        """Returns a copy of the set stored at a key.
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return set(shard.get(key, ()))
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Returns a consistent snapshot of the stored items.
+        """
+        return list(self.snapshot().items())
+
+    def snapshot(self) -> Dict[Hashable, Any]:
+        """Returns a point-in-time copy of the whole map.
+
+        Every shard lock is held, always in the same order, while the
+        copy is taken.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            result = {}
+            for shard in self._shards:
+                result.update(shard)
+            return result
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def clear(self) -> None:
+        """Removes every key.
+        """
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
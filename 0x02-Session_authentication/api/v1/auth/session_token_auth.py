@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Stateless signed session token authentication module for the API.
+"""
+import base64
+import binascii
+import hashlib
+import heapq
+import hmac
+import secrets
+import threading
+import time
+from os import getenv
+from typing import Set
+
+from .session_auth import SessionAuth
+
+
+# Lifetime of the tokens when SESSION_DURATION is not a positive number:
+# revocations are only kept until the tokens they cover expire.
+DEFAULT_DURATION = 24 * 60 * 60
+
+
+def _now_us() -> int:
+    """Returns the current time in microseconds.
+    """
+    return time.time_ns() // 1000
+
+
+class SessionTokenAuth(SessionAuth):
+    """Session authentication class using signed tokens.
+
+    The session cookie carries the user id, the issue and expiry times
+    and a random token id, signed with an HMAC of ``SESSION_SECRET``.
+    Validating it needs no session store, so any worker sharing the
+    secret can serve the request. Early logouts are recorded in a small
+    revocation list that only keeps tokens until they expire, so tokens
+    always expire, after ``DEFAULT_DURATION`` seconds unless
+    ``SESSION_DURATION`` is positive. Times are in microseconds.
+
+    Revocations are also kept in heaps ordered by the time they can be
+    forgotten, so pruning pops only the entries that are due.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new SessionTokenAuth instance.
+        """
+        super().__init__()
+        secret = getenv('SESSION_SECRET')
+        if secret:
+            self._secret = secret.encode('utf-8')
+        else:
+            self._secret = secrets.token_bytes(32)
+        try:
+            self.session_duration = int(getenv('SESSION_DURATION', '0'))
+        except ValueError:
+            self.session_duration = 0
+        if self.session_duration <= 0:
+            self.session_duration = DEFAULT_DURATION
+        self._revoked_tokens = {}
+        self._revoked_before = {}
+        self._token_expiries = []
+        self._cutoff_times = []
+        self._revoked_lock = threading.Lock()
+
+    def create_session(self, user_id: str = None) -> str:
+        """Creates a signed session token for the user.
+        """
+        if not user_id or not isinstance(user_id, str):
+            return None
+        issued_at = _now_us()
+        expires_at = issued_at + self.session_duration * 1000000
+        payload = '{}.{}.{}.{}'.format(
+            base64.urlsafe_b64encode(user_id.encode('utf-8')).decode(),
+            issued_at,
+            expires_at,
+            secrets.token_urlsafe(12),
+        )
+        return '{}.{}'.format(payload, self._sign(payload))
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """Retrieves the user id carried by a valid session token.
+        """
+        claims = self._verify(session_id)
+        if claims is None:
+            return None
+        return claims[0]
+
+    def sessions_for(self, user_id: str = None) -> Set[str]:
+        """Signed tokens are not stored, so they cannot be listed.
+        """
+        return set()
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Revokes every token issued to a user until now.
+        """
+        if not user_id:
+            return 0
+        now = _now_us()
+        with self._revoked_lock:
+            self._revoked_before[user_id] = now
+            heapq.heappush(self._cutoff_times, (now, user_id))
+            self._prune(now)
+        return 0
+
+    def _remove_session(self, session_id: str) -> bool:
+        """Adds a valid session token to the revocation list.
+        """
+        claims = self._verify(session_id)
+        if claims is None:
+            return False
+        _, _, expires_at, token_id = claims
+        with self._revoked_lock:
+            self._revoked_tokens[token_id] = expires_at
+            heapq.heappush(self._token_expiries, (expires_at, token_id))
+            self._prune(_now_us())
+        return True
+
+    def _prune(self, now: int) -> None:
+        """Forgets the revocations of tokens that have expired anyway.
+
+        A cutoff can go once every token issued before it has expired;
+        a cutoff replaced by a later one of the same user is skipped.
+        The caller must hold the revocation lock.
+        """
+        expiries = self._token_expiries
+        while expiries and expiries[0][0] < now:
+            _, token_id = heapq.heappop(expiries)
+            self._revoked_tokens.pop(token_id, None)
+        oldest = now - self.session_duration * 1000000
+        cutoffs = self._cutoff_times
+        while cutoffs and cutoffs[0][0] < oldest:
+            cutoff, user_id = heapq.heappop(cutoffs)
+            if self._revoked_before.get(user_id) == cutoff:
+                del self._revoked_before[user_id]
+
+    def _sign(self, payload: str) -> str:
+        """Computes the signature of a token payload.
+        """
+        digest = hmac.new(
+            self._secret,
+            payload.encode('utf-8'),
+            hashlib.sha256,
+        ).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+    def _verify(self, session_id: str):
+        """Checks the signature, expiry and revocation of a session token.
+
+        Returns:
+        - tuple: The user id, issue time, expiry time and token id,
+        or None if the token is not valid.
+        """
+        if not session_id or not isinstance(session_id, str):
+            return None
+        payload, _, signature = session_id.rpartition('.')
+        if not hmac.compare_digest(self._sign(payload), signature):
+            return None
+        try:
+            user_b64, issued_at, expires_at, token_id = payload.split('.')
+            user_id = base64.urlsafe_b64decode(user_b64).decode('utf-8')
+            issued_at, expires_at = int(issued_at), int(expires_at)
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            return None
+        if expires_at < _now_us():
+            return None
+        if token_id in self._revoked_tokens:
+            return None
+        if issued_at < self._revoked_before.get(user_id, -1):
+            return None
+        return user_id, issued_at, expires_at, token_id
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Memory accounting module for the API.
+"""
+import gc
+import sys
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from os import getenv
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from typing import Any, Dict, List
+
+
+try:
+    TRACE_FRAMES = int(getenv('MEMORY_TRACE_FRAMES', '0'))
+except ValueError:
+    TRACE_FRAMES = 0
+try:
+    MAX_SNAPSHOTS = int(getenv('MEMORY_SNAPSHOTS', '10'))
+except ValueError:
+    MAX_SNAPSHOTS = 10
+SESSION_STORES = (
+    'user_id_by_session_id',
+    'session_ids_by_user_id',
+    '_expiry_queue',
+    '_pending',
+    '_persisted',
+    '_revoked_tokens',
+    '_revoked_before',
+)
+SHARED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+_next_snapshot_id = 0
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Returns the approximate size in bytes of an object and of
+    everything it references, each object being counted once.
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            for key, value in list(obj.items()):
+                pending.append(key)
+                pending.append(value)
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            pending.extend(list(obj))
+        elif hasattr(obj, '__dict__'):
+            pending.append(obj.__dict__)
+        if hasattr(obj, '__slots__'):
+            pending.extend(getattr(obj, name) for name in obj.__slots__
+                           if hasattr(obj, name))
+    return size
+
+
+def store_sizes(auth: Any = None) -> Dict[str, dict]:
+    """Returns the entry count and the deep size of every model store
+    of DATA and of the session stores of an authentication instance.
+    """
+    from models.base import DATA
+    stores = {}
+    for s_class, objs in list(DATA.items()):
+        objs = dict(objs)
+        stores['DATA.{}'.format(s_class)] = {
+            'count': len(objs),
+            'bytes': deep_sizeof(objs),
+        }
+    for name in SESSION_STORES:
+        store = getattr(auth, name, None)
+        if store is None:
+            continue
+        if hasattr(store, 'snapshot'):
+            store = store.snapshot()
+        stores['{}.{}'.format(type(auth).__name__, name)] = {
+            'count': len(store),
+            'bytes': deep_sizeof(store),
+        }
+    return stores
+
+
+def object_counts(limit: int = 20) -> Dict[str, int]:
+    """Returns the number of live objects tracked by the garbage
+    collector for the most common classes.
+    """
+    counts = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+    return dict(counts.most_common(limit))
+
+
+def start_tracing() -> bool:
+    """Starts tracemalloc with MEMORY_TRACE_FRAMES frames per
+    allocation, when that setting is positive.
+    """
+    if TRACE_FRAMES > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    return tracemalloc.is_tracing()
+
+
+def take_snapshot(limit: int = 20) -> dict:
+    """Takes and keeps a tracemalloc snapshot, and returns its ID with
+    its top allocation sites. Only the last MEMORY_SNAPSHOTS snapshots
+    are kept.
+    """
+    global _next_snapshot_id
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    with _snapshots_lock:
+        _next_snapshot_id += 1
+        snapshot_id = _next_snapshot_id
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > max(1, MAX_SNAPSHOTS):
+            _snapshots.popitem(last=False)
+    stats = snapshot.statistics('lineno')[:limit]
+    return {
+        'id': snapshot_id,
+        'traced_bytes': sum(stat.size for stat in snapshot.statistics(
+            'filename')),
+        'top': [_stat_to_json(stat) for stat in stats],
+    }
+
+
+def compare_snapshots(old_id: int, new_id: int = None,
+                      limit: int = 20) -> dict:
+    """Returns the allocation sites that grew or shrank the most between
+    two kept snapshots, or between a kept snapshot and now.
+    """
+    with _snapshots_lock:
+        old = _snapshots.get(old_id)
+        new = _snapshots.get(new_id) if new_id is not None else None
+    if old is None or (new_id is not None and new is None):
+        return None
+    if new is None:
+        if not tracemalloc.is_tracing():
+            return None
+        new = _filtered(tracemalloc.take_snapshot())
+    stats = new.compare_to(old, 'lineno')[:limit]
+    return {
+        'from': old_id,
+        'to': new_id,
+        'size_diff': sum(stat.size_diff for stat in new.compare_to(
+            old, 'filename')),
+        'top': [_stat_to_json(stat) for stat in stats],
+    }
+
+
+def snapshot_ids() -> List[int]:
+    """Returns the IDs of the kept snapshots.
+    """
+    with _snapshots_lock:
+        return list(_snapshots)
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    """Drops the allocations made by tracemalloc itself.
+    """
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+
+
+def _stat_to_json(stat: Any) -> dict:
+    """Converts a tracemalloc Statistic or StatisticDiff to a dictionary.
+    """
+    frame = stat.traceback[0]
+    result = {
+        'site': '{}:{}'.format(frame.filename, frame.lineno),
+        'bytes': stat.size,
+        'count': stat.count,
+    }
+    if hasattr(stat, 'size_diff'):
+        result['bytes_diff'] = stat.size_diff
+        result['count_diff'] = stat.count_diff
+    return result
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Request profiler module for the API.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import threading
+from os import getenv
+
+from flask import Flask, Response, abort, g, request
+
+
+class RequestProfiler:
+    """Sampling request profiler class.
+
+    A request is profiled with cProfile when it carries the
+    ``X-Profile-Token`` header matching ``PROFILE_TOKEN``, or at random
+    with probability ``PROFILE_SAMPLE_RATE``. Stats are merged per URL
+    rule and dumped by a GET on the profiler URL with the same header.
+    Nothing is registered on the app when both settings are unset, so a
+    disabled profiler costs nothing.
+    """
+    header = 'X-Profile-Token'
+
+    def __init__(self) -> None:
+        """Initializes a new RequestProfiler from the environment.
+        """
+        try:
+            self.sample_rate = float(getenv('PROFILE_SAMPLE_RATE', '0'))
+        except ValueError:
+            self.sample_rate = 0.0
+        self.token = getenv('PROFILE_TOKEN') or None
+        self._stats = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Checks if requests can be profiled at all.
+        """
+        return self.sample_rate > 0 or self.token is not None
+
+    def init_app(self, app: Flask, url: str) -> None:
+        """Hooks the profiler into an app and serves the dump at url.
+        """
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+        app.add_url_rule(url, 'profiler', self.dump, methods=['GET'],
+                         strict_slashes=False)
+
+    def _authorized(self) -> bool:
+        """Checks the profiler token header of the request.
+        """
+        sent = request.headers.get(self.header)
+        return self.token is not None and sent is not None and \
+            hmac.compare_digest(sent, self.token)
+
+    def _start(self) -> None:
+        """Starts profiling the request if it is sampled.
+        """
+        if request.endpoint == 'profiler':
+            return
+        if not self._authorized() and random.random() >= self.sample_rate:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return
+        g.profile = profile
+
+    def _stop(self, exception=None) -> None:
+        """Stops profiling the request and merges its stats.
+        """
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        profile.disable()
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        with self._lock:
+            if rule in self._stats:
+                self._stats[rule].add(profile)
+            else:
+                self._stats[rule] = pstats.Stats(profile)
+            self._counts[rule] = self._counts.get(rule, 0) + 1
+
+    def dump(self) -> Response:
+        """ GET profiler URL
+        Query parameters:
+          - endpoint (optional): only this URL rule
+          - sort (optional): pstats sort key, default cumulative
+          - limit (optional): number of functions per endpoint, default 30
+          - restrict (optional): regex on function names,
+            e.g. current_user|search|find_user_by
+          - reset (optional): clear the stats after the dump
+        Return:
+          - the aggregated stats as text
+          - 403 without a valid profiler token
+        """
+        if not self._authorized():
+            abort(403)
+        endpoint = request.args.get('endpoint')
+        sort = request.args.get('sort', 'cumulative')
+        try:
+            limit = int(request.args.get('limit', '30'))
+        except ValueError:
+            limit = 30
+        restrictions = [limit]
+        if request.args.get('restrict'):
+            restrictions.insert(0, request.args.get('restrict'))
+        out = io.StringIO()
+        with self._lock:
+            for rule in sorted(self._stats):
+                if endpoint is not None and rule != endpoint:
+                    continue
+                out.write('== {} ({} requests) ==\n'.format(
+                    rule, self._counts[rule]))
+                stats = self._stats[rule]
+                stats.stream = out
+                stats.sort_stats(sort).print_stats(*restrictions)
+            if request.args.get('reset'):
+                self._stats.clear()
+                self._counts.clear()
+        return Response(out.getvalue(), mimetype='text/plain')
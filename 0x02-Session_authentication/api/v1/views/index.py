@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+import hmac
+import tracemalloc
+from os import getenv
+from flask import jsonify, abort, current_app, request, Response
+from api.v1 import memory
+from api.v1.metrics import render
 from api.v1.views import app_views
 
 
@@ -22,10 +27,62 @@ def stats() -> str:
     """
     from models.user import User
     stats = {}
-    stats['users'] = User.count()
+    stats['users'] = len(User.snapshot())
     return jsonify(stats)
 
 
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> str:
+    """ GET /api/v1/metrics
+    Return:
+      - the latency histograms in the Prometheus text format
+    """
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+@app_views.route('/memory', methods=['GET'], strict_slashes=False)
+def memory_report() -> str:
+    """ GET /api/v1/memory
+    Header:
+      - X-Admin-Token: the value of ADMIN_TOKEN
+    Query parameters:
+      - limit (optional): number of classes and allocation sites
+      - snapshot (optional): keep a tracemalloc snapshot
+      - compare (optional): ID of a kept snapshot to diff against now,
+        or against the snapshot ID given in `to`
+    Return:
+      - object counts, store sizes and allocation sites
+      - 403 without a valid admin token
+    """
+    token = getenv('ADMIN_TOKEN')
+    sent = request.headers.get('X-Admin-Token')
+    if not token or sent is None or not hmac.compare_digest(sent, token):
+        abort(403)
+    auth = current_app.config.get('AUTH')
+    try:
+        limit = int(request.args.get('limit', '20'))
+        compare = request.args.get('compare')
+        compare = int(compare) if compare is not None else None
+        to = request.args.get('to')
+        to = int(to) if to is not None else None
+    except ValueError:
+        return jsonify({"error": "Invalid parameter"}), 400
+    report = {
+        'stores': memory.store_sizes(auth),
+        'objects': memory.object_counts(limit),
+        'tracing': tracemalloc.is_tracing(),
+        'snapshots': memory.snapshot_ids(),
+    }
+    if request.args.get('snapshot'):
+        report['snapshot'] = memory.take_snapshot(limit)
+    if compare is not None:
+        diff = memory.compare_snapshots(compare, to, limit)
+        if diff is None:
+            abort(404)
+        report['diff'] = diff
+    return jsonify(report)
+
+
 @app_views.route('/unauthorized/', strict_slashes=False)
 def unauthorized() -> None:
     """GET /api/v1/unauthorized
@@ -3,26 +3,32 @@
 New session auth
 """
 
-from flask import Flask, request, jsonify
-from api.v1.app import auth
+from os import getenv
+from flask import abort, current_app, request, jsonify
+from api.v1.auth.rate_limit import login_limiters
+from api.v1.views import app_views
+from models.index import casefold
 from models.user import User
 
-app = Flask(__name__)
+LOGIN_IP_LIMITER, LOGIN_EMAIL_LIMITER = login_limiters()
 
 
-@app.route('/api/v1/auth_session/logout', methods=['DELETE'])
+@app_views.route('/auth_session/logout', methods=['DELETE'],
+                 strict_slashes=False)
 def auth_session_logout():
     """
     Use auth.destroy_session(request) to delete the Session ID
     from the request's cookie
     """
+    auth = current_app.config['AUTH']
     if not auth.destroy_session(request):
         abort(404)
 
     return jsonify({}), 200
 
 
-@app.route('/api/v1/auth_session/login', methods=['POST'])
+@app_views.route('/auth_session/login', methods=['POST'],
+                 strict_slashes=False)
 def auth_session_login():
     """Retrieve email and password from request.form"""
     email = request.form.get('email')
@@ -34,21 +40,31 @@ def auth_session_login():
     if not password:
         return jsonify({"error": "password missing"}), 400
 
-    user = User.search({'email': email})
+    """Throttle before any password hashing happens, per account:
+    emails match in any case, so they share a bucket in any case"""
+    if not LOGIN_IP_LIMITER.allow(request.remote_addr) or \
+            not LOGIN_EMAIL_LIMITER.allow(casefold(email)):
+        abort(429)
 
-    if not user:
+    users = User.search({'email': email})
+
+    if not users:
         return jsonify({"error": "no user found for this email"}), 404
 
-    if not user.is_valid_password(password):
+    """Emails match in any case: try the exact-case account first"""
+    users.sort(key=lambda user: user.email != email)
+    user = next((u for u in users if u.is_valid_password(password)), None)
+    if user is None:
         return jsonify({"error": "wrong password"}), 401
 
+    auth = current_app.config['AUTH']
     session_id = auth.create_session(user.id)
 
     """Return the dictionary representation of the User"""
     user_dict = user.to_json()
 
     """Set the cookie to the response"""
-    cookie_name = app.config.get('SESSION_NAME')
+    cookie_name = getenv('SESSION_NAME')
     response = jsonify(user_dict)
     response.set_cookie(cookie_name, session_id)
 
@@ -2,7 +2,7 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, current_app, jsonify, request
 from models.user import User
 
 
@@ -12,7 +12,7 @@ def view_all_users() -> str:
     Return:
       - list of all User objects JSON represented
     """
-    all_users = [user.to_json() for user in User.all()]
+    all_users = [user.to_json() for user in User.snapshot().values()]
     return jsonify(all_users)
 
 
@@ -53,6 +53,9 @@ def delete_user(user_id: str = None) -> str:
     if user is None:
         abort(404)
     user.remove()
+    auth = current_app.config.get('AUTH')
+    if auth is not None:
+        auth.destroy_all_sessions(user.id)
     return jsonify({}), 200
 
 
@@ -66,7 +69,8 @@ def create_user() -> str:
       - first_name (optional)
     Return:
       - User object JSON represented
-      - 400 if can't create the new User
+      - 400 if can't create the new User, or if the email is already
+        registered in any letter case
     """
     rj = None
     error_msg = None
@@ -80,6 +84,8 @@ def create_user() -> str:
         error_msg = "email missing"
     if error_msg is None and rj.get("password", "") == "":
         error_msg = "password missing"
+    if error_msg is None and User.search({'email': rj.get("email")}):
+        error_msg = "email already exists"
     if error_msg is None:
         try:
             user = User()
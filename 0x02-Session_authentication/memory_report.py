@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Memory report of a running API.
+
+Fetches GET /api/v1/memory, prints it as JSON and, with --save, keeps
+it in a file. With --diff, prints how the object counts and the stores
+changed since a saved report instead, so that growing stores such as
+sessions that are never evicted stand out.
+
+Usage:
+    ADMIN_TOKEN=... python3 memory_report.py [--url URL] [--save FILE]
+                                             [--diff FILE] [--snapshot]
+"""
+import argparse
+import json
+from os import getenv
+from urllib.request import Request, urlopen
+
+
+def fetch(url: str, token: str, snapshot: bool = False) -> dict:
+    """Returns the memory report of the API.
+    """
+    if snapshot:
+        url += '?snapshot=1'
+    request = Request(url, headers={'X-Admin-Token': token or ''})
+    with urlopen(request) as response:
+        return json.load(response)
+
+
+def diff(old: dict, new: dict) -> dict:
+    """Returns the changes of the stores and object counts between
+    two reports, largest growth first.
+    """
+    stores = {}
+    for name in sorted(set(old['stores']) | set(new['stores'])):
+        before = old['stores'].get(name, {'count': 0, 'bytes': 0})
+        after = new['stores'].get(name, {'count': 0, 'bytes': 0})
+        stores[name] = {
+            'count': after['count'],
+            'count_diff': after['count'] - before['count'],
+            'bytes': after['bytes'],
+            'bytes_diff': after['bytes'] - before['bytes'],
+        }
+    objects = {
+        name: new['objects'].get(name, 0) - old['objects'].get(name, 0)
+        for name in set(old['objects']) | set(new['objects'])
+    }
+    return {
+        'stores': dict(sorted(stores.items(),
+                              key=lambda x: -x[1]['bytes_diff'])),
+        'objects': dict(sorted(objects.items(), key=lambda x: -x[1])),
+    }
+
+
+def main() -> None:
+    """Prints or diffs the memory report of the API.
+    """
+    parser = argparse.ArgumentParser(description='API memory report.')
+    parser.add_argument('--url', default='http://localhost:5000/api/v1/memory')
+    parser.add_argument('--save', help='keep the report in this file')
+    parser.add_argument('--diff', help='compare with a saved report')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='also keep a tracemalloc snapshot')
+    args = parser.parse_args()
+    report = fetch(args.url, getenv('ADMIN_TOKEN'), args.snapshot)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f)
+    if args.diff:
+        with open(args.diff) as f:
+            print(json.dumps(diff(json.load(f), report), indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
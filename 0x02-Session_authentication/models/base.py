@@ -2,19 +2,28 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
+from typing import TypeVar, List, Iterable, Mapping
 from os import path
+from types import MappingProxyType
 import json
+import threading
 import uuid
+from models.index import Index
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+INDEXES = {}
+VERSIONS = {}
+LOADED = set()
+_load_lock = threading.Lock()
+_write_lock = threading.RLock()
 
 
 class Base():
     """ Base class
     """
+    indexes = {}
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
@@ -63,14 +72,30 @@ class Base():
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        objs = {}
+        if path.exists(file_path):
+            with open(file_path, 'r') as f:
+                objs_json = json.load(f)
+                for obj_id, obj_json in objs_json.items():
+                    objs[obj_id] = cls(**obj_json)
+        indexes = {}
+        for attribute, normalize in cls.indexes.items():
+            index = indexes[attribute] = Index(normalize)
+            for obj_id, obj in objs.items():
+                index.update(obj_id, getattr(obj, attribute, None))
+        with _write_lock:
+            INDEXES[s_class] = indexes
+            cls._publish(objs)
+        LOADED.add(s_class)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def ensure_loaded(cls):
+        """ Load all objects from file on first use
+        """
+        if cls.__name__ not in LOADED:
+            with _load_lock:
+                if cls.__name__ not in LOADED:
+                    cls.load_from_file()
 
     @classmethod
     def save_to_file(cls):
@@ -85,53 +110,196 @@ class Base():
         with open(file_path, 'w') as f:
             json.dump(objs_json, f)
 
+    @classmethod
+    def _publish(cls, objs: dict):
+        """ Publish a new version of the objects of the class
+
+        A published dict is never changed again: writers copy it, change
+        the copy and publish that, so readers iterate without locks.
+        """
+        DATA[cls.__name__] = objs
+        VERSIONS[cls.__name__] = VERSIONS.get(cls.__name__, 0) + 1
+
+    @classmethod
+    def snapshot(cls) -> Mapping[str, TypeVar('Base')]:
+        """ Return a read-only view of the current version of the
+        objects by ID, which later writes never change
+        """
+        cls.ensure_loaded()
+        return MappingProxyType(DATA[cls.__name__])
+
+    @classmethod
+    def version(cls) -> int:
+        """ Return the number of versions published so far
+        """
+        cls.ensure_loaded()
+        return VERSIONS[cls.__name__]
+
+    @classmethod
+    def _index(cls, obj: TypeVar('Base')):
+        """ Update the indexes with the current values of an object
+        """
+        for attribute, index in INDEXES[cls.__name__].items():
+            index.update(obj.id, getattr(obj, attribute, None))
+
+    @classmethod
+    def _unindex(cls, obj_id: str):
+        """ Remove an object from the indexes
+        """
+        for index in INDEXES[cls.__name__].values():
+            index.discard(obj_id)
+
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self.__class__.ensure_loaded()
+        with _write_lock:
+            self.updated_at = datetime.utcnow()
+            objs = dict(DATA[s_class])
+            objs[self.id] = self
+            self.__class__._index(self)
+            self.__class__._publish(objs)
+            self.__class__.save_to_file()
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        self.__class__.ensure_loaded()
+        with _write_lock:
+            if DATA[s_class].get(self.id) is not None:
+                objs = dict(DATA[s_class])
+                del objs[self.id]
+                self.__class__._unindex(self.id)
+                self.__class__._publish(objs)
+                self.__class__.save_to_file()
+
+    @classmethod
+    def save_many(cls, objs: Iterable[TypeVar('Base')] = (),
+                  removed: Iterable[TypeVar('Base')] = ()):
+        """ Save and remove several objects with a single write to file
+        """
+        s_class = cls.__name__
+        cls.ensure_loaded()
+        with _write_lock:
+            store = dict(DATA[s_class])
+            now = datetime.utcnow()
+            for obj in objs:
+                obj.updated_at = now
+                store[obj.id] = obj
+                cls._index(obj)
+            for obj in removed:
+                if store.pop(obj.id, None) is not None:
+                    cls._unindex(obj.id)
+            cls._publish(store)
+            cls.save_to_file()
+
+    @classmethod
+    def insert_many(cls, objs: Iterable[TypeVar('Base')] = (),
+                    persist: bool = True) -> int:
+        """ Insert or replace objects as they are, timestamps included,
+        with at most one write to file
+        """
+        s_class = cls.__name__
+        cls.ensure_loaded()
+        with _write_lock:
+            store = dict(DATA[s_class])
+            count = 0
+            for obj in objs:
+                store[obj.id] = obj
+                cls._index(obj)
+                count += 1
+            cls._publish(store)
+            if persist:
+                cls.save_to_file()
+        return count
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
+        cls.ensure_loaded()
         return len(DATA[s_class].keys())
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
-        """ Return all objects
+        """ Return all objects of the current version
         """
-        return cls.search()
+        return list(cls.snapshot().values())
 
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
         s_class = cls.__name__
+        cls.ensure_loaded()
         return DATA[s_class].get(id)
 
+    @classmethod
+    def explain(cls, attributes: dict = {}) -> dict:
+        """ Describe how search would find the objects with matching
+        attributes: the indexes intersected, from the most selective,
+        and the attributes left to compare on the candidates
+        """
+        s_class = cls.__name__
+        cls.ensure_loaded()
+        indexes = INDEXES[s_class]
+        lookups = sorted(
+            ((k, indexes[k].get(v)) for k, v in attributes.items()
+             if k in indexes),
+            key=lambda lookup: len(lookup[1]))
+        rows = len(DATA[s_class])
+        plan = []
+        candidates = None
+        for attribute, ids in lookups:
+            candidates = ids if candidates is None else candidates & ids
+            plan.append({'attribute': attribute, 'rows': len(ids)})
+        if candidates is not None:
+            rows = len(candidates)
+        return {
+            'model': s_class,
+            'strategy': 'index' if plan else 'scan',
+            'indexes': plan,
+            'scan': [k for k in attributes if k not in indexes],
+            'rows': rows,
+        }
+
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        Indexed attributes narrow the candidates first, starting from
+        the most selective one, and every attribute is then compared on
+        the candidates left. Indexed attributes compare by index key,
+        so an email matches whatever its case.
         """
         s_class = cls.__name__
+        cls.ensure_loaded()
+        store = DATA[s_class]
+        indexes = INDEXES[s_class]
+        lookups = sorted(
+            (indexes[k].get(v) for k, v in attributes.items() if k in indexes),
+            key=len)
+        if lookups:
+            candidates = lookups[0]
+            for ids in lookups[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & ids
+            objs = filter(None, map(store.get, candidates))
+        else:
+            objs = store.values()
+        keys = [(k, indexes[k].normalize if k in indexes else None, v)
+                for k, v in attributes.items()]
+        keys = [(k, f, f(v) if f else v) for k, f, v in keys]
+
         def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
+            for k, normalize, v in keys:
+                value = getattr(obj, k)
+                if (normalize(value) if normalize else value) != v:
                     return False
             return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+
+        return list(filter(_search, objs))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Index module
+"""
+from typing import Any, Callable, FrozenSet, Hashable
+
+
+def exact(value: Any) -> Hashable:
+    """ Index key of a value compared as is
+    """
+    return value
+
+
+def casefold(value: Any) -> Hashable:
+    """ Index key of a value compared without case, like an email
+    """
+    if isinstance(value, str):
+        return value.casefold()
+    return value
+
+
+class Index():
+    """ Attribute index: object IDs by normalized attribute value
+
+    Buckets are frozen sets replaced on every change, so a reader can
+    keep using the bucket it got while a writer updates the index.
+    Writers must be serialized by the caller.
+    """
+
+    def __init__(self, normalize: Callable[[Any], Hashable] = exact):
+        """ Initialize an empty index
+        """
+        self.normalize = normalize
+        self._buckets = {}
+        self._keys = {}
+
+    def get(self, value: Any) -> FrozenSet[str]:
+        """ Return the IDs of the objects indexed under a value
+        """
+        try:
+            return self._buckets.get(self.normalize(value), frozenset())
+        except TypeError:
+            return frozenset()
+
+    def update(self, obj_id: str, value: Any):
+        """ Move an object under the key of its current value
+        """
+        key = self.normalize(value)
+        if obj_id in self._keys:
+            if self._keys[obj_id] == key:
+                return
+            self.discard(obj_id)
+        bucket = self._buckets.get(key, frozenset())
+        self._buckets[key] = bucket | {obj_id}
+        self._keys[obj_id] = key
+
+    def discard(self, obj_id: str):
+        """ Remove an object from the index
+        """
+        if obj_id not in self._keys:
+            return
+        key = self._keys.pop(obj_id)
+        bucket = self._buckets.get(key, frozenset()) - {obj_id}
+        if bucket:
+            self._buckets[key] = bucket
+        else:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        """ Number of distinct keys
+        """
+        return len(self._buckets)
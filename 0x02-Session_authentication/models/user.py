@@ -3,11 +3,13 @@
 """
 import hashlib
 from models.base import Base
+from models.index import casefold
 
 
 class User(Base):
     """ User class
     """
+    indexes = {'email': casefold}
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark for the session store.
+
+Runs a login/lookup/logout mix against a single-lock dict and against
+the lock-striped ShardedMap for 1 to 64 threads.
+
+Usage:
+    python3 session_store_bench.py [operations_per_thread] [shards]
+"""
+import sys
+import threading
+import time
+from uuid import uuid4
+
+from api.v1.auth.session_store import ShardedMap
+
+
+class LockedDict:
+    """Single-lock dict baseline exposing the ShardedMap calls used.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new LockedDict instance.
+        """
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def __setitem__(self, key, value) -> None:
+        """Sets the value of a key.
+        """
+        with self._lock:
+            self._data[key] = value
+
+    def get(self, key, default=None):
+        """Returns the value of a key.
+        """
+        with self._lock:
+            return self._data.get(key, default)
+
+    def pop(self, key, default=None):
+        """Removes a key and returns its value.
+        """
+        with self._lock:
+            return self._data.pop(key, default)
+
+
+def run(store, threads: int, operations: int) -> float:
+    """
+    Drives the store from several threads at once.
+
+    Returns:
+    - float: The throughput in operations per second.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        """Logs in, looks up the session twice and logs out."""
+        session_ids = [str(uuid4()) for _ in range(operations)]
+        barrier.wait()
+        for session_id in session_ids:
+            store[session_id] = 'user'
+            store.get(session_id)
+            store.get(session_id)
+            store.pop(session_id, None)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * operations * 4 / elapsed
+
+
+def main() -> None:
+    """Prints the throughput of both stores for 1 to 64 threads."""
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print("{:>7} {:>14} {:>14}".format("threads", "locked dict", "sharded"))
+    for threads in (1, 2, 4, 8, 16, 32, 64):
+        locked = run(LockedDict(), threads, operations)
+        sharded = run(ShardedMap(shards), threads, operations)
+        print("{:>7} {:>12.0f}/s {:>12.0f}/s".format(
+            threads, locked, sharded))
+
+
+if __name__ == "__main__":
+    main()
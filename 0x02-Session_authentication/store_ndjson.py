@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+NDJSON import and export of the object store.
+
+Export writes one object per line, so nothing but the store itself is
+held in memory. Import reads the file in chunks and inserts each chunk
+into the store without saving the file per object; the file is written
+every --checkpoint chunks and at the end. After each write the byte
+offset reached is kept in FILE.progress, so an interrupted import
+resumes from the last checkpoint (pass --restart to start over).
+Objects keep their IDs and timestamps, and an object whose ID already
+exists is replaced, so replaying lines is harmless.
+
+Usage:
+    python3 store_ndjson.py export User [--where email=a@b.c]
+                                        [--output FILE]
+    python3 store_ndjson.py import User FILE [--where first_name=Bob]
+                                             [--chunk-size N]
+                                             [--checkpoint N] [--restart]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, IO, Iterator, List, Tuple
+
+from models.user import User
+from models.user_session import UserSession
+
+MODELS = {cls.__name__: cls for cls in (User, UserSession)}
+
+
+def parse_where(pairs: List[str]) -> Dict[str, str]:
+    """Returns the attributes filter of key=value pairs.
+    """
+    attributes = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition('=')
+        if not sep or not key:
+            raise ValueError('invalid filter {!r}'.format(pair))
+        attributes[key] = value
+    return attributes
+
+
+def export_objects(cls: type, attributes: Dict[str, str],
+                   out: IO[str]) -> int:
+    """Writes the matching objects of a class as NDJSON lines and
+    returns their number.
+    """
+    count = 0
+    for obj in cls.snapshot().values():
+        obj_json = obj.to_json(True)
+        if _matches(obj_json, attributes):
+            out.write(json.dumps(obj_json) + '\n')
+            count += 1
+    return count
+
+
+def read_chunks(f: IO[bytes], chunk_size: int, line_number: int = 0
+                ) -> Iterator[Tuple[List[Tuple[int, dict]], int, int]]:
+    """Yields the parsed lines of an NDJSON file by chunks, with the
+    byte offset and the number of lines read after each chunk. Invalid
+    lines are yielded as None with their line number.
+    """
+    chunk = []
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            obj_json = json.loads(line.decode('utf-8'))
+        except ValueError:
+            obj_json = None
+        if not isinstance(obj_json, dict):
+            obj_json = None
+        chunk.append((line_number, obj_json))
+        if len(chunk) >= chunk_size:
+            yield chunk, f.tell(), line_number
+            chunk = []
+    if chunk:
+        yield chunk, f.tell(), line_number
+
+
+def _matches(obj_json: dict, attributes: Dict[str, str]) -> bool:
+    """Checks if a serialized object matches every filter, the same way
+    on export and import. A missing or null attribute matches nothing.
+    """
+    for key, value in attributes.items():
+        if obj_json.get(key) is None or str(obj_json[key]) != value:
+            return False
+    return True
+
+
+def import_objects(cls: type, path: str, attributes: Dict[str, str],
+                   chunk_size: int = 1000, checkpoint: int = 10,
+                   restart: bool = False) -> dict:
+    """Imports the matching objects of an NDJSON file and returns the
+    numbers of imported, skipped and invalid lines.
+    """
+    progress_path = path + '.progress'
+    progress = {'offset': 0, 'lines': 0,
+                'imported': 0, 'skipped': 0, 'invalid': 0}
+    if not restart and os.path.exists(progress_path):
+        with open(progress_path) as f:
+            progress.update(json.load(f))
+    pending = 0
+    with open(path, 'rb') as f:
+        f.seek(progress['offset'])
+        chunks = read_chunks(f, max(1, chunk_size), progress['lines'])
+        for chunk, offset, lines in chunks:
+            objs = []
+            for line_number, obj_json in chunk:
+                if obj_json is not None and \
+                        not _matches(obj_json, attributes):
+                    progress['skipped'] += 1
+                    continue
+                try:
+                    objs.append(cls(**obj_json))
+                except (TypeError, ValueError):
+                    print('line {}: invalid object'.format(line_number),
+                          file=sys.stderr)
+                    progress['invalid'] += 1
+            progress['imported'] += cls.insert_many(objs, persist=False)
+            progress['offset'] = offset
+            progress['lines'] = lines
+            pending += 1
+            if pending >= checkpoint:
+                _checkpoint(cls, progress_path, progress)
+                pending = 0
+    cls.save_to_file()
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    return progress
+
+
+def _checkpoint(cls: type, progress_path: str, progress: dict) -> None:
+    """Saves the store, then the offset it covers.
+    """
+    cls.save_to_file()
+    with open(progress_path, 'w') as f:
+        json.dump(progress, f)
+
+
+def main() -> None:
+    """Runs the export or import command.
+    """
+    parser = argparse.ArgumentParser(description='NDJSON store transfer.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export')
+    export.add_argument('model', choices=sorted(MODELS))
+    export.add_argument('--where', action='append')
+    export.add_argument('--output')
+    load = commands.add_parser('import')
+    load.add_argument('model', choices=sorted(MODELS))
+    load.add_argument('file')
+    load.add_argument('--where', action='append')
+    load.add_argument('--chunk-size', type=int, default=1000)
+    load.add_argument('--checkpoint', type=int, default=10)
+    load.add_argument('--restart', action='store_true')
+    args = parser.parse_args()
+    try:
+        attributes = parse_where(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    cls = MODELS[args.model]
+    if args.command == 'export':
+        if args.output:
+            with open(args.output, 'w') as out:
+                count = export_objects(cls, attributes, out)
+        else:
+            count = export_objects(cls, attributes, sys.stdout)
+        print('exported {} {}'.format(count, args.model), file=sys.stderr)
+    else:
+        report = import_objects(cls, args.file, attributes,
+                                args.chunk_size, args.checkpoint,
+                                args.restart)
+        del report['offset']
+        del report['lines']
+        print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,68 @@
 #!/usr/bin/env python3
 """Basic Flask app"""
 
-from flask import Flask, abort, jsonify, redirect, request
+from collections import Counter
+import io
+import time
+from flask import Flask, Response, abort, g, jsonify, redirect, request
 from auth import Auth
+from bulk_import import detect_format, parse_records
+from compression import ResponseCompressor
+from metrics import REQUEST_SECONDS, Stats, render, timed
+from password_executor import PasswordExecutorBusy
+from profiler import RequestProfiler
+from rate_limiter import login_limiters
 
 app = Flask(__name__)
+ResponseCompressor().init_app(app)
+RequestProfiler().init_app(app)
 AUTH = Auth()
+Stats(
+    "password_executor",
+    "Calls, queue wait and hash time of the password executor.",
+    AUTH.password_stats,
+    counters=("completed", "rejected", "queue_wait_seconds_total",
+              "hash_seconds_total"),
+)
+Stats(
+    "email_filter",
+    "Size and estimated accuracy of the registered email Bloom filter.",
+    AUTH.email_filter_stats,
+)
+LOGIN_IP_LIMITER, LOGIN_EMAIL_LIMITER = login_limiters()
+
+
+@app.before_request
+def start_timer() -> None:
+    """Start timing the request"""
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+    """Record the request latency by route and status"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route,
+            str(response.status_code),
+        )
+    return response
+
+
+@app.teardown_appcontext
+def close_db_session(exception=None) -> None:
+    """Release the request's database session"""
+    AUTH.teardown()
+
+
+@app.errorhandler(PasswordExecutorBusy)
+def password_workers_busy(error):
+    """Reject password work quickly when the hashing queue is full"""
+    return jsonify({"message": "service busy"}), 503
 
 
 @app.route('/', methods=["GET"], strict_slashes=False)
@@ -14,6 +71,12 @@ def welcome():
     return jsonify({"message": "Bienvenue"})
 
 
+@app.route('/metrics', methods=["GET"], strict_slashes=False)
+def metrics():
+    """Return the latency and component metrics in the Prometheus format"""
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/users', methods=['POST'], strict_slashes=False)
 def register_users():
     """
@@ -40,6 +103,32 @@ def register_users():
         return jsonify({"message": "email already registered"}), 400
 
 
+@app.route('/users/bulk', methods=['POST'], strict_slashes=False)
+def register_users_bulk():
+    """
+    Endpoint for bulk user registration.
+
+    Expects a request body in NDJSON (one {"email", "password"} object
+    per line) or CSV (with an "email,password" header), chosen from the
+    Content-Type header or the "format" query parameter.
+
+    Returns:
+    - JSON payload with the number of "created", "duplicate" and
+      "invalid" rows, and a "rows" list with the status of each row.
+      Status Code: 200
+    """
+    fmt = request.args.get("format") or detect_format(request.content_type)
+    body = io.StringIO(request.get_data(as_text=True), newline="")
+    report = AUTH.register_users(parse_records(body, fmt))
+    counts = Counter(row["status"] for row in report)
+    return jsonify({
+        "created": counts["created"],
+        "duplicate": counts["duplicate"],
+        "invalid": counts["invalid"],
+        "rows": report,
+    })
+
+
 @app.route('/sessions', methods=['POST'], strict_slashes=False)
 def login():
     """
@@ -52,7 +141,12 @@ def login():
     Returns:
         bool: True if login is valid, False otherwise.
     """
-    email, password = request.form.get('email'), request.form.get('password')
+    with timed('header_parse'):
+        email = request.form.get('email')
+        password = request.form.get('password')
+    if not LOGIN_IP_LIMITER.allow(request.remote_addr) or \
+            not LOGIN_EMAIL_LIMITER.allow(email):
+        abort(429)
     if AUTH.valid_login(email, password):
         response = jsonify({"email": email, "message": "logged in"})
         response.set_cookie("session_id", AUTH.create_session(email))
@@ -79,7 +173,7 @@ def logout():
     session_id = request.cookies.get("session_id")
     user = AUTH.get_user_from_session_id(session_id)
     if user is not None:
-        AUTH.destroy_session(user.id)
+        AUTH.destroy_session(user.id, session_id)
         return redirect('/')
     abort(403)
 
@@ -171,4 +265,5 @@ def update_password():
 
 
 if __name__ == "__main__":
+    AUTH.warmup()
     app.run(host="0.0.0.0", port="5000")
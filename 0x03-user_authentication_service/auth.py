@@ -4,10 +4,22 @@ User authentication module
 """
 
 import bcrypt
+from datetime import datetime, timedelta
 from db import DB
+from email_filter import BloomFilter
+from metrics import timed
+import os
+from password_executor import PasswordExecutor
+from session_cache import SessionCache
+import threading
+from typing import Iterable, List, Optional
 from user import User
 import uuid
 
+SESSION_DURATION = int(os.getenv("SESSION_DURATION", "86400"))
+RESET_TOKEN_DURATION = int(os.getenv("RESET_TOKEN_DURATION", "900"))
+PURGE_INTERVAL = float(os.getenv("PURGE_INTERVAL", "300"))
+
 
 def _hash_password(password: str) -> str:
     """
@@ -29,6 +41,99 @@ class Auth:
 
     def __init__(self):
         self._db = DB()
+        self._passwords = PasswordExecutor()
+        self._session_cache = SessionCache()
+        self._email_filter = BloomFilter()
+        self._warm = False
+        self._warmup_lock = threading.Lock()
+
+    def warmup(self) -> None:
+        """
+        Initialize the database schema, fill the registered email filter
+        and start the purge thread.
+
+        Runs once, on first use of the email filter or when called
+        explicitly before serving requests.
+
+        Returns:
+        - None
+        """
+        with self._warmup_lock:
+            if self._warm:
+                return
+            self._db.init_schema()
+            try:
+                self._email_filter.update(self._db.iter_emails())
+            finally:
+                self._db.remove_session()
+            if PURGE_INTERVAL > 0:
+                purger = threading.Thread(
+                    target=self._purge_forever, name="purge", daemon=True
+                )
+                purger.start()
+            self._warm = True
+
+    @property
+    def _emails(self) -> BloomFilter:
+        """
+        Filter of the registered emails, warmed up on first use.
+        """
+        if not self._warm:
+            self.warmup()
+        return self._email_filter
+
+    def password_stats(self) -> dict:
+        """
+        Report the metrics of the password hashing executor.
+
+        Returns:
+        - dict: The queue wait and hash time metrics.
+        """
+        return self._passwords.stats()
+
+    def email_filter_stats(self) -> dict:
+        """
+        Report the size and accuracy of the registered email filter.
+
+        Returns:
+        - dict: The memory used and the false-positive rates.
+        """
+        return self._emails.stats()
+
+    def teardown(self) -> None:
+        """
+        Release the database session used by the current request.
+
+        Returns:
+        - None
+        """
+        self._db.remove_session()
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired sessions and reset tokens from the database in
+        bounded batches.
+
+        Returns:
+        - int: The number of rows deleted.
+        """
+        now = datetime.utcnow()
+        try:
+            return self._db.purge_expired_sessions(now) + \
+                self._db.purge_expired_reset_tokens(now)
+        finally:
+            self._db.remove_session()
+
+    def _purge_forever(self) -> None:
+        """
+        Periodically purge expired rows in the background.
+        """
+        stop = threading.Event()
+        while not stop.wait(PURGE_INTERVAL):
+            try:
+                self.purge_expired()
+            except Exception:
+                pass
 
     def register_user(self, email: str, password: str) -> User:
         """
@@ -41,14 +146,65 @@ class Auth:
         Returns:
             User: The User object representing the registered user.
         """
-        try:
-            user = self._db.find_user_by(email=email)
-        except Exception:
-            user = None
+        user = None
+        if email in self._emails:
+            try:
+                user = self._db.find_user_by(email=email)
+            except Exception:
+                user = None
         if user:
             raise ValueError('User {} already exist'.format(email))
-        hashed_password = _hash_password(password)
-        return self._db.add_user(email, hashed_password)
+        hashed_password = self._passwords.run(_hash_password, password)
+        user = self._db.add_user(email, hashed_password)
+        if user is not None:
+            self._emails.add(email)
+        return user
+
+    def register_users(self,
+                       records: Iterable[Optional[dict]]) -> List[dict]:
+        """
+        Register many users at once.
+
+        Emails already registered are found with set-based queries,
+        passwords are hashed in parallel and users are inserted in
+        chunked transactions.
+
+        Args:
+            records (Iterable[Optional[dict]]): One dict per user with
+            "email" and "password", or None for an unparsable row.
+
+        Returns:
+            List[dict]: One entry per record with its "row" number,
+            "email" and "status": "created", "duplicate" or "invalid".
+        """
+        report, pending = [], {}
+        for row, record in enumerate(records, 1):
+            record = record if isinstance(record, dict) else {}
+            email, password = record.get("email"), record.get("password")
+            entry = {"row": row, "email": email}
+            report.append(entry)
+            if not email or not isinstance(email, str) or \
+                    not password or not isinstance(password, str):
+                entry["status"] = "invalid"
+            elif email in pending:
+                entry["status"] = "duplicate"
+            else:
+                pending[email] = (entry, password)
+        candidates = [email for email in pending if email in self._emails]
+        for email in self._db.find_existing_emails(candidates):
+            pending.pop(email)[0]["status"] = "duplicate"
+        emails = list(pending)
+        hashed_passwords = self._passwords.map(
+            _hash_password, [pending[email][1] for email in emails]
+        )
+        created = self._db.add_users(zip(emails, hashed_passwords))
+        self._emails.update(created)
+        for email in emails:
+            if email in created:
+                pending[email][0]["status"] = "created"
+            else:
+                pending[email][0]["status"] = "duplicate"
+        return report
 
     def valid_login(self, email: str, password: str) -> bool:
         """
@@ -61,11 +217,17 @@ class Auth:
         Returns:
             bool: True if login is valid, False otherwise.
         """
+        if email not in self._emails:
+            return False
         try:
-            user = self._db.find_user_by(email=email)
+            with timed('user_lookup'):
+                user = self._db.find_user_by(email=email)
         except Exception:
             return False
-        return bcrypt.checkpw(password.encode('utf-8'), user.hashed_password)
+        with timed('password_verify'):
+            return self._passwords.run(
+                bcrypt.checkpw, password.encode('utf-8'), user.hashed_password
+            )
 
     def _generate_uuid(self) -> str:
         """
@@ -87,12 +249,14 @@ class Auth:
         Returns:
         - session_id: A string representing the newly generated sessionID
         """
+        session_id = self._generate_uuid()
+        expires_at = datetime.utcnow() + timedelta(seconds=SESSION_DURATION)
         try:
-            user = self._db.find_user_by(email=email)
+            created = self._db.add_user_session(email, session_id, expires_at)
         except Exception:
             return None
-        session_id = self._generate_uuid()
-        self._db.update_user(user.id, session_id=session_id)
+        if created == 0:
+            return None
         return session_id
 
     def get_user_from_session_id(self, session_id: str) -> User:
@@ -106,24 +270,41 @@ class Auth:
         - Optional[User]: The corresponding User if found, else None.
         """
         if session_id:
+            user = self._session_cache.get(session_id)
+            if user is not None:
+                return user
+            generation = self._session_cache.generation()
+            now = datetime.utcnow()
             try:
-                user = self._db.find_user_by(session_id=session_id)
+                with timed('session_lookup'):
+                    user, expires_at = self._db.find_user_by_session_id(
+                        session_id, now
+                    )
             except Exception:
                 return None
-            return user
+            return self._session_cache.put(
+                session_id, user, (expires_at - now).total_seconds(),
+                generation,
+            )
         return None
 
-    def destroy_session(self, user_id: int) -> None:
+    def destroy_session(self, user_id: int, session_id: str = None) -> None:
         """
-        Destroys the session for the user with the specified user ID.
+        Destroys a session of the user with the specified user ID.
 
         Parameters:
         - user_id: An integer representing the user's ID.
+        - session_id: The session to destroy. Every session of the user
+        is destroyed when it is omitted.
 
         Returns:
         - None
         """
-        self._db.update_user(user_id, session_id=None)
+        self._db.delete_user_sessions(user_id, session_id)
+        if session_id is None:
+            self._session_cache.invalidate(user_id=user_id)
+        else:
+            self._session_cache.invalidate(session_id=session_id)
         return None
 
     def get_reset_password_token(self, email: str) -> str:
@@ -137,12 +318,15 @@ class Auth:
         Returns:
         - str: The generated reset password token.
         """
+        reset_token = self._generate_uuid()
+        expires_at = datetime.utcnow() + \
+            timedelta(seconds=RESET_TOKEN_DURATION)
         try:
-            user = self._db.find_user_by(email=email)
-        except UserNotFoundError:
+            created = self._db.add_reset_token(email, reset_token, expires_at)
+        except Exception:
+            created = 0
+        if created == 0:
             raise ValueError("User DNE")
-        reset_token = str(uuid.uuid4())
-        self._db.update_user(user.id, reset_token=reset_token)
         return reset_token
 
     def update_password(self, reset_token: str, password: str) -> None:
@@ -155,16 +339,27 @@ class Auth:
 
         Returns:
         - None
+
+        Raises:
+        - ValueError: If the reset token is unknown or expired.
         """
-        user = None
         try:
-            user = self._db.find_user_by(reset_token=reset_token)
+            user = self._db.find_user_by_reset_token(
+                reset_token, datetime.utcnow()
+            )
         except Exception:
-            user = None
-        if user is not None:
-            hashed_password = _hash_password(password)
-            self._db.update_user(
-                user.id, hashed_password=hashed_password,
-                reset_token=None
+            raise ValueError
+        # Hash before consuming the token: a busy executor must not
+        # leave the client without a token and without a new password.
+        hashed_password = self._passwords.run(_hash_password, password)
+        try:
+            user_id = self._db.consume_reset_token(
+                reset_token, datetime.utcnow()
             )
-        raise ValueError
+        except Exception:
+            raise ValueError
+        if user_id != user.id:
+            raise ValueError
+        self._db.update_user(user_id, hashed_password=hashed_password)
+        self._db.delete_reset_tokens(user_id)
+        self._session_cache.invalidate(user_id=user_id)
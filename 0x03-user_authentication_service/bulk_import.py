@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Bulk user registration importer
+
+Reads users from an NDJSON or CSV file (one object or row per user with
+"email" and "password") and sends them in chunks to POST /users/bulk,
+printing the per-row report as NDJSON.
+
+Usage:
+    python3 bulk_import.py FILE [--format ndjson|csv] [--url URL]
+                                [--chunk-size N]
+"""
+import argparse
+import csv
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from urllib.request import Request, urlopen
+
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def detect_format(content_type: str = None, filename: str = None) -> str:
+    """
+    Guess the format of a user file.
+
+    Args:
+    - content_type (str): The Content-Type header of a request.
+    - filename (str): The name of the file.
+
+    Returns:
+    - str: "csv" or "ndjson".
+    """
+    if content_type and "csv" in content_type:
+        return "csv"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+def parse_records(lines: Iterable[str],
+                  fmt: str = "ndjson") -> Iterator[Optional[dict]]:
+    """
+    Parse users lazily from NDJSON or CSV lines.
+
+    Args:
+    - lines (Iterable[str]): The lines of the file, header first for CSV.
+    - fmt (str): "ndjson" or "csv".
+
+    Returns:
+    - Iterator[Optional[dict]]: One record per user, None for a line
+    that cannot be parsed so it is still reported.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def _encode_chunk(records: List[Optional[dict]]) -> bytes:
+    """
+    Serialize a chunk of records as NDJSON.
+    """
+    return "".join(
+        json.dumps(record) + "\n" for record in records
+    ).encode("utf-8")
+
+
+def main() -> None:
+    """
+    Import a user file through the bulk registration endpoint.
+    """
+    parser = argparse.ArgumentParser(description="Bulk register users.")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES))
+    parser.add_argument("--url", default="http://localhost:5000/users/bulk")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    fmt = args.format or detect_format(filename=args.file)
+    offset = 0
+    with open(args.file, newline="") as f:
+        records = parse_records(f, fmt)
+        while True:
+            chunk = list(islice(records, args.chunk_size))
+            if not chunk:
+                break
+            request = Request(
+                args.url,
+                data=_encode_chunk(chunk),
+                headers={"Content-Type": CONTENT_TYPES["ndjson"]},
+                method="POST",
+            )
+            with urlopen(request) as response:
+                report = json.load(response)
+            for row in report["rows"]:
+                row["row"] += offset
+                print(json.dumps(row))
+            offset += len(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,40 @@
 """
 database module
 """
-from sqlalchemy import create_engine, tuple_
+from datetime import datetime
+import threading
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from sqlalchemy import (DateTime, create_engine, delete, event, insert,
+                        literal, select, text)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Query, scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import QueuePool
 
+from reset_token import ResetToken
 from user import Base, User
+from user_session import UserSession
+
+POOL_SIZE = 8
+POOL_MAX_OVERFLOW = 16
+PURGE_BATCH_SIZE = 500
+INSERT_CHUNK_SIZE = 500
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Tune every new SQLite connection for concurrent access.
+
+    WAL journaling lets readers run alongside a writer, and
+    synchronous=NORMAL only syncs at checkpoints, which is safe in WAL mode.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
 
 
 class DB:
@@ -20,19 +46,47 @@ class DB:
     def __init__(self) -> None:
         """Initialize a new DB instance
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+        self._engine = create_engine(
+            "sqlite:///a.db",
+            echo=False,
+            poolclass=QueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=POOL_MAX_OVERFLOW,
+            connect_args={"check_same_thread": False},
+        )
+        event.listen(self._engine, "connect", _set_sqlite_pragmas)
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def init_schema(self) -> None:
+        """
+        Reset the schema of the database, once.
+
+        This runs on first use of the session, or earlier when called
+        explicitly as a warmup step, so creating a DB stays cheap.
+        """
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            Base.metadata.drop_all(self._engine)
+            Base.metadata.create_all(self._engine)
+            self._schema_ready = True
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session object of the current thread
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        if not self._schema_ready:
+            self.init_schema()
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """
+        Close the session of the current thread and return its
+        connection to the pool.
+        """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """
@@ -54,6 +108,83 @@ class DB:
             user = None
         return user
 
+    def add_users(self, users: Iterable[Tuple[str, bytes]],
+                  chunk_size: int = INSERT_CHUNK_SIZE) -> Set[str]:
+        """
+        Add many users, inserting and committing them in chunks.
+
+        A chunk that fails, e.g. because one of its emails was registered
+        in the meantime, is retried one user at a time so the rest of the
+        chunk is still created.
+
+        Args:
+            users (Iterable[Tuple[str, bytes]]): Pairs of email and
+            hashed password.
+            chunk_size (int): The number of users per transaction.
+
+        Returns:
+            Set[str]: The emails of the users that were created.
+        """
+        created = set()
+        users = list(users)
+        for start in range(0, len(users), chunk_size):
+            chunk = [
+                {"email": email, "hashed_password": hashed_password}
+                for email, hashed_password in users[start:start + chunk_size]
+            ]
+            try:
+                self._session.execute(insert(User), chunk)
+                self._session.commit()
+                created.update(row["email"] for row in chunk)
+                continue
+            except Exception:
+                self._session.rollback()
+            for row in chunk:
+                if self.add_user(**row) is not None:
+                    created.add(row["email"])
+        return created
+
+    def find_existing_emails(self, emails: Iterable[str],
+                             chunk_size: int = INSERT_CHUNK_SIZE) -> Set[str]:
+        """
+        Return which of the given emails are already registered, using
+        one IN query per chunk of emails.
+
+        Args:
+            emails (Iterable[str]): The emails to look up.
+            chunk_size (int): The number of emails per query.
+
+        Returns:
+            Set[str]: The registered emails.
+        """
+        emails = list(emails)
+        existing = set()
+        for start in range(0, len(emails), chunk_size):
+            rows = self._session.execute(
+                select(User.email).where(
+                    User.email.in_(emails[start:start + chunk_size])
+                )
+            )
+            existing.update(email for email, in rows)
+        return existing
+
+    def iter_emails(self,
+                    batch_size: int = INSERT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Stream the email of every user.
+
+        Args:
+            batch_size (int): The number of rows fetched at a time.
+
+        Returns:
+            Iterator[str]: The registered emails.
+        """
+        rows = self._session.execute(
+            select(User.email).execution_options(yield_per=batch_size)
+        )
+        for email, in rows:
+            yield email
+
     def find_user_by(self, **kwargs) -> User:
         """
         Find a user in the database based on the provided keyword arguments.
@@ -68,16 +199,7 @@ class DB:
             NoResultFound: If no results are found.
             InvalidRequestError: If wrong query arguments are passed.
         """
-        fields, values = [], []
-        for key, value in kwargs.items():
-            if hasattr(User, key):
-                fields.append(getattr(User, key))
-                values.append(value)
-            else:
-                raise InvalidRequestError()
-        result = self._session.query(User).filter(
-            tuple_(*fields).in_([tuple(values)])
-        ).first()
+        result = self._query_users_by(**kwargs).first()
         if result is None:
             raise NoResultFound()
         return result
@@ -98,17 +220,345 @@ class DB:
             ValueError: If an invalid argument is passed that does not
             correspond to a user attribute.
         """
-        user = self.find_user_by(id=user_id)
-        if user is None:
-            return
+        if self.update_user_by({"id": user_id}, **kwargs) == 0:
+            raise NoResultFound()
+
+    def update_user_by(self, criteria: dict, **kwargs) -> int:
+        """
+        Update the users matching the criteria with a single UPDATE
+        statement, without loading them first.
+
+        Args:
+            criteria (dict): The filters selecting the users, usually a
+            single indexed attribute such as {"email": email}.
+            **kwargs: Arbitrary keyword arguments representing the updates.
+
+        Returns:
+            int: The number of users matched by the criteria.
+
+        Raises:
+            InvalidRequestError: If wrong query arguments are passed.
+            ValueError: If an invalid argument is passed that does not
+            correspond to a user attribute.
+        """
         update_source = {}
         for key, value in kwargs.items():
             if hasattr(User, key):
                 update_source[getattr(User, key)] = value
             else:
                 raise ValueError()
-        self._session.query(User).filter(User.id == user_id).update(
-            update_source,
-            synchronize_session=False,
+        try:
+            matched = self._query_users_by(**criteria).update(
+                update_source,
+                synchronize_session=False,
+            )
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return matched
+
+    def add_user_session(self, email: str, session_id: str,
+                         expires_at: datetime) -> int:
+        """
+        Create a session for the user with the given email using a
+        single INSERT ... SELECT statement.
+
+        Args:
+            email (str): The email of the user.
+            session_id (str): The new session ID.
+            expires_at (datetime): When the session stops being valid.
+
+        Returns:
+            int: The number of sessions created, 0 if no user has
+            that email.
+        """
+        user_columns = select(
+            User.id,
+            literal(session_id),
+            literal(datetime.utcnow(), DateTime),
+            literal(expires_at, DateTime),
+        ).where(User.email == email)
+        statement = insert(UserSession).from_select(
+            ["user_id", "session_id", "created_at", "expires_at"],
+            user_columns,
+        )
+        try:
+            created = self._session.execute(statement).rowcount
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return created
+
+    def find_user_by_session_id(self, session_id: str,
+                                now: datetime) -> Tuple[User, datetime]:
+        """
+        Find the user owning a session that has not expired yet.
+
+        Args:
+            session_id (str): The session ID.
+            now (datetime): The current time.
+
+        Returns:
+            Tuple[User, datetime]: The user and the session expiry time.
+
+        Raises:
+            NoResultFound: If no live session has this ID.
+        """
+        result = self._query_session_user(session_id, now).first()
+        if result is None:
+            raise NoResultFound()
+        return result
+
+    def delete_user_sessions(self, user_id: int,
+                             session_id: str = None) -> int:
+        """
+        Delete one session of a user, or all of them.
+
+        Args:
+            user_id (int): The ID of the user.
+            session_id (str): The session to delete; every session of
+            the user when omitted.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        query = self._session.query(UserSession).filter(
+            UserSession.user_id == user_id
+        )
+        if session_id is not None:
+            query = query.filter(UserSession.session_id == session_id)
+        try:
+            deleted = query.delete(synchronize_session=False)
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return deleted
+
+    def purge_expired_sessions(self, now: datetime,
+                               batch_size: int = PURGE_BATCH_SIZE) -> int:
+        """
+        Delete expired sessions in bounded batches.
+
+        Args:
+            now (datetime): The current time.
+            batch_size (int): The maximum number of rows per transaction.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        return self._purge_expired(UserSession, now, batch_size)
+
+    def add_reset_token(self, email: str, token: str,
+                        expires_at: datetime) -> int:
+        """
+        Issue a reset token to the user with the given email using a
+        single INSERT ... SELECT statement.
+
+        Args:
+            email (str): The email of the user.
+            token (str): The new reset token.
+            expires_at (datetime): When the token stops being valid.
+
+        Returns:
+            int: The number of tokens created, 0 if no user has
+            that email.
+        """
+        user_columns = select(
+            User.id,
+            literal(token),
+            literal(expires_at, DateTime),
+        ).where(User.email == email)
+        statement = insert(ResetToken).from_select(
+            ["user_id", "token", "expires_at"],
+            user_columns,
+        )
+        try:
+            created = self._session.execute(statement).rowcount
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return created
+
+    def find_user_by_reset_token(self, token: str, now: datetime) -> User:
+        """
+        Find the user a live reset token was issued to.
+
+        Args:
+            token (str): The reset token.
+            now (datetime): The current time.
+
+        Returns:
+            User: The User object found in the database.
+
+        Raises:
+            NoResultFound: If no live reset token matches.
+        """
+        result = self._session.query(User).join(
+            ResetToken, ResetToken.user_id == User.id
+        ).filter(
+            ResetToken.token == token,
+            ResetToken.expires_at > now,
+        ).first()
+        if result is None:
+            raise NoResultFound()
+        return result
+
+    def consume_reset_token(self, token: str, now: datetime) -> int:
+        """
+        Delete a live reset token and return the user it was issued to,
+        using a single DELETE ... RETURNING statement, so concurrent
+        requests with the same token cannot both consume it.
+
+        Args:
+            token (str): The reset token.
+            now (datetime): The current time.
+
+        Returns:
+            int: The ID of the user.
+
+        Raises:
+            NoResultFound: If no live reset token matches.
+        """
+        statement = self._consume_reset_token_statement(token, now)
+        try:
+            user_id = self._session.execute(statement).scalar()
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        if user_id is None:
+            raise NoResultFound()
+        return user_id
+
+    def delete_reset_tokens(self, user_id: int) -> int:
+        """
+        Delete every reset token issued to a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            int: The number of tokens deleted.
+        """
+        try:
+            deleted = self._session.query(ResetToken).filter(
+                ResetToken.user_id == user_id
+            ).delete(synchronize_session=False)
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        return deleted
+
+    def purge_expired_reset_tokens(
+            self, now: datetime,
+            batch_size: int = PURGE_BATCH_SIZE) -> int:
+        """
+        Delete expired reset tokens in bounded batches.
+
+        Args:
+            now (datetime): The current time.
+            batch_size (int): The maximum number of rows per transaction.
+
+        Returns:
+            int: The number of tokens deleted.
+        """
+        return self._purge_expired(ResetToken, now, batch_size)
+
+    def query_plan(self, **kwargs) -> List[str]:
+        """
+        Describe how SQLite runs find_user_by for the given filters.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments representing the filters.
+
+        Returns:
+            List[str]: The detail column of EXPLAIN QUERY PLAN, e.g.
+            "SEARCH users USING INDEX ix_users_email (email=?)".
+        """
+        return self.explain(self._query_users_by(**kwargs).statement)
+
+    def explain(self, statement) -> List[str]:
+        """
+        Describe how SQLite runs a statement.
+
+        Args:
+            statement: The SQLAlchemy statement, e.g. query.statement.
+
+        Returns:
+            List[str]: The detail column of EXPLAIN QUERY PLAN.
+        """
+        compiled = statement.compile(
+            self._engine,
+            compile_kwargs={"literal_binds": True},
         )
-        self._session.commit()
+        rows = self._session.execute(
+            text("EXPLAIN QUERY PLAN {}".format(compiled))
+        )
+        return [row[-1] for row in rows]
+
+    def _query_session_user(self, session_id: str, now: datetime) -> Query:
+        """
+        Build the query of find_user_by_session_id: the user and expiry
+        time of a live session, found through the sessions index.
+        """
+        return self._session.query(User, UserSession.expires_at).join(
+            UserSession, UserSession.user_id == User.id
+        ).filter(
+            UserSession.session_id == session_id,
+            UserSession.expires_at > now,
+        )
+
+    def _consume_reset_token_statement(self, token: str, now: datetime):
+        """
+        Build the statement of consume_reset_token: delete a live reset
+        token, found through the tokens index, returning its user ID.
+        """
+        return delete(ResetToken).where(
+            ResetToken.token == token,
+            ResetToken.expires_at > now,
+        ).returning(ResetToken.user_id)
+
+    def _query_users_by(self, **kwargs) -> Query:
+        """
+        Build a users query with one equality predicate per filter, so
+        SQLite can serve it from the column indexes.
+
+        Raises:
+            InvalidRequestError: If wrong query arguments are passed.
+        """
+        criteria = []
+        for key, value in kwargs.items():
+            if hasattr(User, key):
+                criteria.append(getattr(User, key) == value)
+            else:
+                raise InvalidRequestError()
+        return self._session.query(User).filter(*criteria)
+
+    def _purge_expired(self, model: Base, now: datetime,
+                       batch_size: int) -> int:
+        """
+        Delete the rows of a model whose expires_at is past, committing
+        every batch_size rows so no transaction holds the write lock
+        for long.
+        """
+        purged = 0
+        while True:
+            expired_ids = select(model.id).where(
+                model.expires_at <= now
+            ).limit(batch_size)
+            try:
+                deleted = self._session.execute(
+                    delete(model).where(model.id.in_(expired_ids))
+                ).rowcount
+                self._session.commit()
+            except Exception:
+                self._session.rollback()
+                raise
+            purged += deleted
+            if deleted < batch_size:
+                return purged
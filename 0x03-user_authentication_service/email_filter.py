@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Bloom filter of registered emails
+"""
+import hashlib
+import math
+import os
+import threading
+from typing import Dict, Iterable
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings with no false negatives.
+
+    `email in bloom` being False means the email was never added, so the
+    database does not need to be asked. True may be a false positive,
+    with a probability close to `error_rate` while fewer than `capacity`
+    items have been added.
+    """
+
+    def __init__(self, capacity: int = None, error_rate: float = None):
+        """
+        Initialize a new BloomFilter sized for its capacity.
+
+        Args:
+            capacity (int): The expected number of items. Defaults to
+            EMAIL_FILTER_CAPACITY or 1000000.
+            error_rate (float): The target false-positive rate. Defaults
+            to EMAIL_FILTER_ERROR_RATE or 0.01.
+        """
+        if capacity is None:
+            capacity = int(os.getenv("EMAIL_FILTER_CAPACITY", "1000000"))
+        if error_rate is None:
+            error_rate = float(os.getenv("EMAIL_FILTER_ERROR_RATE", "0.01"))
+        self.capacity = max(1, capacity)
+        self.error_rate = min(max(error_rate, 1e-9), 0.5)
+        self.bit_count = int(math.ceil(
+            -self.capacity * math.log(self.error_rate) / math.log(2) ** 2
+        ))
+        self.hash_count = max(1, int(round(
+            self.bit_count / self.capacity * math.log(2)
+        )))
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """
+        Yield the bit positions of an item using double hashing.
+        """
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
+
+    def add(self, item: str) -> None:
+        """
+        Add an item to the filter.
+
+        Args:
+            item (str): The item, e.g. an email.
+        """
+        with self._lock:
+            for position in self._positions(item):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        """
+        Add many items to the filter.
+
+        Args:
+            items (Iterable[str]): The items.
+        """
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        """
+        Check if an item may have been added.
+        """
+        if not isinstance(item, str):
+            return False
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report the size and the expected accuracy of the filter.
+
+        Returns:
+            Dict[str, float]: The configuration, the number of items
+            added, the memory used and the estimated false-positive rate
+            at the current fill.
+        """
+        estimated = (1 - math.exp(
+            -self.hash_count * self.count / self.bit_count
+        )) ** self.hash_count
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "bits": self.bit_count,
+            "hashes": self.hash_count,
+            "count": self.count,
+            "memory_bytes": len(self._bits),
+            "estimated_false_positive_rate": estimated,
+        }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Login load test for the user authentication service.
+
+Registers one user, then drives POST /sessions through the Flask test
+client from an increasing number of threads and prints the login
+throughput for each level.
+
+Usage:
+    python3 login_load_test.py [seconds_per_level] [max_threads]
+"""
+import os
+import sys
+import threading
+import time
+
+# Every login comes from one address for one email: lift the throttle.
+os.environ["LOGIN_IP_RATE"] = "0"
+os.environ["LOGIN_EMAIL_RATE"] = "0"
+
+from app import app  # noqa: E402
+
+EMAIL = "load@test.com"
+PASSWORD = "load-test-password"
+
+
+def run(threads: int, seconds: float) -> float:
+    """
+    Log in repeatedly from several threads for a fixed time.
+
+    Args:
+    - threads (int): The number of concurrent clients.
+    - seconds (float): How long to keep logging in.
+
+    Returns:
+    - float: The number of successful logins per second.
+    """
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index: int) -> None:
+        """Log in until the deadline."""
+        client = app.test_client()
+        form = {"email": EMAIL, "password": PASSWORD}
+        while time.perf_counter() < deadline:
+            if client.post("/sessions", data=form).status_code == 200:
+                counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Print the login throughput for 1 to max_threads threads."""
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    app.test_client().post(
+        "/users", data={"email": EMAIL, "password": PASSWORD})
+    threads = 1
+    print("{:>7} {:>12}".format("threads", "logins/s"))
+    while threads <= max_threads:
+        print("{:>7} {:>12.1f}".format(threads, run(threads, seconds)))
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Request latency and component metrics in the Prometheus text format
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STRIPES = 8
+REGISTRY = []
+
+
+class Histogram:
+    """
+    Record latencies in cumulative buckets, per label values.
+
+    Observations are spread over a few lock stripes picked by the native
+    thread id, which the kernel hands out sequentially, so concurrent
+    requests rarely wait on each other. The stripes are only merged when
+    the metrics are rendered.
+    """
+
+    def __init__(self, name: str, documentation: str,
+                 label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = BUCKETS) -> None:
+        """
+        Initialize a new Histogram and register it.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._stripes = [({}, threading.Lock()) for _ in range(STRIPES)]
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record one observation for the given label values.
+        """
+        series, lock = self._stripes[threading.get_native_id() % STRIPES]
+        index = bisect_left(self.buckets, value)
+        with lock:
+            counts = series.get(labels)
+            if counts is None:
+                counts = series[labels] = [0] * (len(self.buckets) + 1) + [0.]
+            counts[index] += 1
+            counts[-1] += value
+
+    def collect(self) -> dict:
+        """
+        Merge the stripes into bucket counts per label values, each
+        followed by the sum of the observations.
+        """
+        merged = {}
+        for series, lock in self._stripes:
+            with lock:
+                items = [(k, list(v)) for k, v in series.items()]
+            for labels, counts in items:
+                total = merged.setdefault(labels, [0] * len(counts))
+                for i, count in enumerate(counts):
+                    total[i] += count
+        return merged
+
+    def render(self) -> List[str]:
+        """
+        Return the histogram in the Prometheus text format.
+        """
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation),
+            "# TYPE {} histogram".format(self.name),
+        ]
+        for labels, counts in sorted(self.collect().items()):
+            pairs = ['{}="{}"'.format(k, _escape(v))
+                     for k, v in zip(self.label_names, labels)]
+            cumulative = 0
+            bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append("{}_bucket{{{}}} {}".format(
+                    self.name, ",".join(pairs + ['le="{}"'.format(bound)]),
+                    cumulative))
+            lines.append("{}_sum{{{}}} {}".format(
+                self.name, ",".join(pairs), counts[-1]))
+            lines.append("{}_count{{{}}} {}".format(
+                self.name, ",".join(pairs), cumulative))
+        return lines
+
+
+class Stats:
+    """
+    Export the numbers of a component's stats() snapshot.
+
+    Every key becomes a gauge named after the prefix, except the keys
+    listed as counters, which are exported as counters ending in
+    _total. The snapshot is taken when the metrics are rendered.
+    """
+
+    def __init__(self, prefix: str, documentation: str,
+                 collect: Callable[[], Dict[str, float]],
+                 counters: Iterable[str] = ()) -> None:
+        """
+        Initialize a new Stats exporter and register it.
+        """
+        self.prefix = prefix
+        self.documentation = documentation
+        self.collect = collect
+        self.counters = frozenset(counters)
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        """
+        Return the snapshot in the Prometheus text format.
+        """
+        lines = []
+        for key, value in sorted(self.collect().items()):
+            name = "{}_{}".format(self.prefix, key)
+            kind = "gauge"
+            if key in self.counters:
+                kind = "counter"
+                if not name.endswith("_total"):
+                    name += "_total"
+            lines.append("# HELP {} {}".format(name, self.documentation))
+            lines.append("# TYPE {} {}".format(name, kind))
+            lines.append("{} {}".format(name, value))
+        return lines
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"') \
+        .replace("\n", "\\n")
+
+
+def render() -> str:
+    """
+    Return every registered metric in the Prometheus text format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Time an authentication stage.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        AUTH_STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving HTTP requests.",
+    ("method", "route", "status"),
+)
+AUTH_STAGE_SECONDS = Histogram(
+    "auth_stage_duration_seconds",
+    "Time spent in each authentication stage.",
+    ("stage",),
+)
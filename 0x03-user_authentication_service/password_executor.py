@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Bounded executor for password hashing and checking
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+
+class PasswordExecutorBusy(Exception):
+    """
+    Raised when every password worker is busy and the queue is full.
+    """
+
+
+class PasswordExecutor:
+    """
+    Runs bcrypt work on a dedicated pool of threads.
+
+    At most `workers + queue_depth` calls are accepted at once; any
+    further call fails fast with PasswordExecutorBusy instead of pinning
+    one more request thread behind the hashing backlog.
+    """
+
+    def __init__(self, workers: int = None, queue_depth: int = None):
+        """
+        Initialize a new PasswordExecutor.
+
+        Args:
+            workers (int): The number of hashing threads. Defaults to
+            PASSWORD_WORKERS or the number of CPUs.
+            queue_depth (int): The number of calls allowed to wait for a
+            worker. Defaults to PASSWORD_QUEUE_DEPTH or 4 per worker.
+        """
+        if workers is None:
+            workers = int(os.getenv("PASSWORD_WORKERS", os.cpu_count() or 1))
+        if queue_depth is None:
+            queue_depth = int(os.getenv("PASSWORD_QUEUE_DEPTH", workers * 4))
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="password",
+        )
+        self._slots = threading.BoundedSemaphore(
+            self.workers + self.queue_depth
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def run(self, func: Callable, *args) -> Any:
+        """
+        Run a password function on the pool and wait for its result.
+
+        Args:
+            func (Callable): The function to run, e.g. bcrypt.checkpw.
+            *args: The arguments passed to the function.
+
+        Returns:
+            Any: The value returned by the function.
+
+        Raises:
+            PasswordExecutorBusy: If the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordExecutorBusy()
+        try:
+            future = self._executor.submit(
+                self._timed, time.perf_counter(), func, *args
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def map(self, func: Callable, *iterables) -> List[Any]:
+        """
+        Run a password function over many arguments on the pool.
+
+        Unlike run, this waits for free slots instead of failing, and
+        keeps at most `workers` of its own calls in flight so that
+        interactive calls can still use the queue.
+
+        Args:
+            func (Callable): The function to run, e.g. _hash_password.
+            *iterables: The arguments, one iterable per parameter.
+
+        Returns:
+            List[Any]: The values returned, in the order of the arguments.
+        """
+        window = threading.BoundedSemaphore(self.workers)
+
+        def release(_) -> None:
+            """Free the slots held by a finished call."""
+            self._slots.release()
+            window.release()
+
+        futures = []
+        for args in zip(*iterables):
+            window.acquire()
+            self._slots.acquire()
+            future = self._executor.submit(
+                self._timed, time.perf_counter(), func, *args
+            )
+            future.add_done_callback(release)
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return a snapshot of the executor metrics.
+
+        Returns:
+            Dict[str, float]: The configuration, the number of completed
+            and rejected calls, and the queue wait and hash times.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["queue_depth"] = self.queue_depth
+        return stats
+
+    def _timed(self, submitted: float, func: Callable, *args) -> Any:
+        """
+        Run a function on a worker, recording how long it waited in the
+        queue and how long it ran.
+        """
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            wait, elapsed = started - submitted, finished - started
+            with self._lock:
+                stats = self._stats
+                stats["completed"] += 1
+                stats["queue_wait_seconds_total"] += wait
+                stats["hash_seconds_total"] += elapsed
+                if wait > stats["queue_wait_seconds_max"]:
+                    stats["queue_wait_seconds_max"] = wait
+                if elapsed > stats["hash_seconds_max"]:
+                    stats["hash_seconds_max"] = elapsed
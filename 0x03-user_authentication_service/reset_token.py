@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Contains a SQLAlchemy model named ResetToken for a database table
+named reset_tokens
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from user import Base
+
+
+class ResetToken(Base):
+    """
+    SQLAlchemy model representing the 'reset_tokens' table.
+
+    Attributes:
+        - id (int): The integer primary key.
+        - token (str): A non-nullable, unique and indexed string
+        representing the reset token for password reset.
+        - user_id (int): A non-nullable, indexed reference to the user
+        the token was issued to.
+        - expires_at (datetime): A non-nullable, indexed timestamp after
+        which the token can no longer be used.
+    """
+    __tablename__ = 'reset_tokens'
+
+    id = Column(Integer, primary_key=True)
+    token = Column(String(250), nullable=False, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False,
+                     index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
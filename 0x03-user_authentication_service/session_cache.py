@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+In-process cache of the users behind session IDs
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from user import User
+
+
+class SessionCache:
+    """
+    Bounded LRU cache mapping a session ID to a snapshot of its user.
+
+    Entries expire after `ttl` seconds and are also dropped explicitly
+    by user ID or email whenever the user's session or credentials
+    change, so a hit never outlives a logout on this process. Every
+    invalidation bumps a generation counter, and a user read from the
+    database is only cached if no invalidation ran since the cache miss.
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        """
+        Initialize a new SessionCache.
+
+        Args:
+            max_size (int): The maximum number of cached sessions.
+            Defaults to SESSION_CACHE_SIZE or 10000.
+            ttl (float): The number of seconds an entry stays valid.
+            Defaults to SESSION_CACHE_TTL or 30.
+        """
+        if max_size is None:
+            max_size = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+        if ttl is None:
+            ttl = float(os.getenv("SESSION_CACHE_TTL", "30"))
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_user_id = {}
+        self._by_email = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[User]:
+        """
+        Return the cached user of a session ID.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            Optional[User]: The user snapshot, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < now:
+                self._discard(session_id)
+                return None
+            self._entries.move_to_end(session_id)
+            return user
+
+    def generation(self) -> int:
+        """
+        Return the number of invalidations so far.
+
+        Read it on a cache miss, before loading the user, and pass it to
+        `put`.
+
+        Returns:
+            int: The current generation.
+        """
+        with self._lock:
+            return self._generation
+
+    def put(self, session_id: str, user: User, ttl: float = None,
+            generation: int = None) -> User:
+        """
+        Cache a detached snapshot of the user behind a session ID.
+
+        Args:
+            session_id (str): The session ID.
+            user (User): The user loaded from the database.
+            ttl (float): The time left before the session expires, which
+            caps the cache TTL.
+            generation (int): The generation read before the user was
+            loaded. Nothing is cached if an invalidation ran since, as
+            the user may belong to a session destroyed meanwhile.
+
+        Returns:
+            User: The snapshot that was cached.
+        """
+        snapshot = User(**{
+            column.name: getattr(user, column.name)
+            for column in User.__table__.columns
+        })
+        if ttl is None or ttl > self.ttl:
+            ttl = self.ttl
+        if self.max_size <= 0 or ttl <= 0:
+            return snapshot
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return snapshot
+            self._discard(session_id)
+            self._entries[session_id] = (expires_at, snapshot)
+            self._by_user_id.setdefault(snapshot.id, set()).add(session_id)
+            self._by_email.setdefault(snapshot.email, set()).add(session_id)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+        return snapshot
+
+    def invalidate(self, user_id: int = None, email: str = None,
+                   session_id: str = None) -> None:
+        """
+        Drop one cached session, or every cached session of a user.
+
+        Args:
+            user_id (int): The ID of the user.
+            email (str): The email of the user.
+            session_id (str): The session ID.
+        """
+        with self._lock:
+            self._generation += 1
+            session_ids = set(self._by_user_id.get(user_id, ()))
+            session_ids.update(self._by_email.get(email, ()))
+            session_ids.add(session_id)
+            for cached_id in session_ids:
+                self._discard(cached_id)
+
+    def _discard(self, session_id: str) -> None:
+        """
+        Remove a cached session and its index entries.
+        The lock must be held by the caller.
+        """
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        user = entry[1]
+        for index, key in ((self._by_user_id, user.id),
+                           (self._by_email, user.email)):
+            session_ids = index.get(key)
+            if session_ids is not None:
+                session_ids.discard(session_id)
+                if not session_ids:
+                    del index[key]
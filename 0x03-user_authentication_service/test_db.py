@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests of the query plans of the DB module
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from db import DB
+
+
+class TestQueryPlan(unittest.TestCase):
+    """
+    Check that the user lookups are served from the column indexes.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create a DB in a temporary working directory.
+        """
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.db = DB()
+
+    def tearDown(self) -> None:
+        """
+        Close the DB and remove the temporary working directory.
+        """
+        self.db.remove_session()
+        self.db._engine.dispose()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def assertSearches(self, plan, index: str) -> None:
+        """
+        Assert that a query plan searches a table through an index.
+        """
+        self.assertTrue(
+            any("USING INDEX {} ".format(index) in detail
+                for detail in plan),
+            "{} not used: {}".format(index, plan),
+        )
+
+    def test_email(self) -> None:
+        """
+        Look users up by email through its index.
+        """
+        plan = self.db.query_plan(email="bob@example.com")
+        self.assertSearches(plan, "ix_users_email")
+
+    def test_session_user(self) -> None:
+        """
+        Find the user of a session through the session ID index, then
+        the users primary key.
+        """
+        plan = self.db.explain(
+            self.db._query_session_user("0d9f7a3e", datetime.utcnow())
+            .statement
+        )
+        self.assertSearches(plan, "ix_sessions_session_id")
+        self.assertFalse(
+            any(detail.startswith("SCAN") for detail in plan), plan
+        )
+
+    def test_consume_reset_token(self) -> None:
+        """
+        Delete a reset token through the token index.
+        """
+        plan = self.db.explain(
+            self.db._consume_reset_token_statement(
+                "5c1e2b8a", datetime.utcnow()
+            )
+        )
+        self.assertSearches(plan, "ix_reset_tokens_token")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,19 +15,19 @@ class User(Base):
 
     Attributes:
         - id (int): The integer primary key.
-        - email (str): A non-nullable string representing the user's
-        email address.
+        - email (str): A non-nullable, unique and indexed string
+        representing the user's email address.
         - hashed_password (str): A non-nullable string representing
         the hashed user password.
-        - session_id (str): A nullable string representing the user's
-        session ID.
-        - reset_token (str): A nullable string representing the reset
-        token for password reset.
+        - session_id (str): A nullable string representing the
+        user's session ID.
+        - reset_token (str): A nullable string representing the
+        reset token for password reset.
     """
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    email = Column(String(250), nullable=False)
+    email = Column(String(250), nullable=False, unique=True, index=True)
     hashed_password = Column(String(250), nullable=False)
     session_id = Column(String(250), nullable=True)
     reset_token = Column(String(250), nullable=True)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Contains a SQLAlchemy model named UserSession for a database table
+named sessions
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from user import Base
+
+
+class UserSession(Base):
+    """
+    SQLAlchemy model representing the 'sessions' table.
+
+    A user can hold any number of sessions, one per device.
+
+    Attributes:
+        - id (int): The integer primary key.
+        - session_id (str): A non-nullable, unique and indexed string
+        representing the session ID sent as a cookie.
+        - user_id (int): A non-nullable, indexed reference to the user
+        owning the session.
+        - created_at (datetime): When the session was created.
+        - expires_at (datetime): A non-nullable, indexed timestamp after
+        which the session is no longer valid.
+    """
+    __tablename__ = 'sessions'
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(250), nullable=False, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False,
+                     index=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
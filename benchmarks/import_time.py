@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the three authentication services.
+
+Imports each app in a fresh interpreter with `python -X importtime`,
+keeps the fastest of a few runs, and prints the cumulative import time
+of the app with its slowest modules. With --budget-ms, exits with status
+1 when an app imports slower than the budget, so a regression in cold
+start (an eager backend import, a store loaded at import) fails the run.
+
+Usage:
+    python3 benchmarks/import_time.py
+        [--service basic|session|session_db|user|all] [--runs N]
+        [--top N] [--budget-ms MS] [--output results.json]
+
+Every import runs in a temporary working directory, so the file and
+SQLite stores never touch the repository.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    # 0x01 ships without a models package; it runs on the 0x02 models.
+    "basic": {
+        "paths": ["0x01-Basic_authentication", "0x02-Session_authentication"],
+        "module": "api.v1.app",
+        "env": {"AUTH_TYPE": "basic_auth"},
+    },
+    "session": {
+        "paths": ["0x02-Session_authentication"],
+        "module": "api.v1.app",
+        "env": {"AUTH_TYPE": "session_auth", "SESSION_NAME": "_my_session_id"},
+    },
+    "session_db": {
+        "paths": ["0x02-Session_authentication"],
+        "module": "api.v1.app",
+        "env": {"AUTH_TYPE": "session_db_auth",
+                "SESSION_NAME": "_my_session_id", "SESSION_DURATION": "60"},
+    },
+    "user": {
+        "paths": ["0x03-user_authentication_service"],
+        "module": "app",
+        "env": {},
+    },
+}
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """
+    Parse the report written by `python -X importtime`.
+
+    Args:
+        stderr (str): The standard error of the interpreter.
+
+    Returns:
+        List[Dict[str, object]]: One entry per imported module with its
+        self and cumulative times in microseconds.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return modules
+
+
+def profile_import(service: str) -> List[Dict[str, object]]:
+    """
+    Import the app of a service once in a fresh interpreter.
+
+    Args:
+        service (str): A key of SERVICES.
+
+    Returns:
+        List[Dict[str, object]]: The parsed import-time report.
+    """
+    config = SERVICES[service]
+    env = dict(os.environ, **config["env"])
+    env["PYTHONPATH"] = os.pathsep.join(
+        os.path.join(ROOT, path) for path in config["paths"]
+    )
+    with tempfile.TemporaryDirectory(prefix="import-time-") as cwd:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             "import {}".format(config["module"])],
+            cwd=cwd, env=env, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError("importing {} failed:\n{}".format(
+            service, result.stderr[-2000:]))
+    return parse_importtime(result.stderr)
+
+
+def profile_service(service: str, runs: int, top: int) -> dict:
+    """
+    Profile the import of a service and keep its fastest run.
+
+    Args:
+        service (str): A key of SERVICES.
+        runs (int): The number of fresh interpreters to start.
+        top (int): The number of slowest modules to report.
+
+    Returns:
+        dict: The app's cumulative import time and its slowest modules.
+    """
+    module = SERVICES[service]["module"]
+    best = None
+    for _ in range(max(1, runs)):
+        modules = profile_import(service)
+        total = next(m["cumulative_us"] for m in modules
+                     if m["module"] == module)
+        if best is None or total < best[0]:
+            best = (total, modules)
+    total, modules = best
+    slowest = sorted(modules, key=lambda m: m["self_us"], reverse=True)
+    return {
+        "service": service,
+        "import_ms": total / 1000,
+        "modules": len(modules),
+        "slowest": slowest[:top],
+    }
+
+
+def main() -> None:
+    """
+    Profile the imports and enforce the budget.
+    """
+    parser = argparse.ArgumentParser(description="App import-time profile.")
+    parser.add_argument("--service", default="all",
+                        choices=sorted(SERVICES) + ["all"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    services = sorted(SERVICES) if args.service == "all" else [args.service]
+    results = [profile_service(s, args.runs, args.top) for s in services]
+    over = []
+    for result in results:
+        print("{service}: {import_ms:.1f} ms, {modules} modules".format(
+            **result))
+        for module in result["slowest"]:
+            print("  {:>9.1f} ms  {}".format(
+                module["self_us"] / 1000, module["module"]))
+        if args.budget_ms is not None and \
+                result["import_ms"] > args.budget_ms:
+            over.append(result["service"])
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if over:
+        print("over the {} ms budget: {}".format(
+            args.budget_ms, ", ".join(over)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
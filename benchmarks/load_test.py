@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the three authentication services.
+
+Seeds users, then drives a weighted mix of login, profile, list-users and
+create-user requests at increasing concurrency, either in-process through
+the Flask test client or over HTTP against a local threaded WSGI server.
+Requests/s and p50/p95/p99 latencies are printed per endpoint and saved
+as JSON so runs can be compared.
+
+Usage:
+    python3 benchmarks/load_test.py [--service basic|session|user|all]
+        [--mode inprocess|wsgi] [--users N] [--duration SECONDS]
+        [--concurrency 1,2,4,...] [--mix login=1,profile=5,...]
+        [--output results.json]
+
+Every service runs in its own subprocess and temporary working directory,
+so the file and SQLite stores never touch the repository.
+"""
+import argparse
+import base64
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "load-test-password"
+SERVICES = {
+    # 0x01 ships without a models package; it runs on the 0x02 models.
+    "basic": {
+        "paths": ["0x01-Basic_authentication", "0x02-Session_authentication"],
+        "env": {"AUTH_TYPE": "basic_auth"},
+    },
+    "session": {
+        "paths": ["0x02-Session_authentication"],
+        "env": {
+            "AUTH_TYPE": "session_auth",
+            "SESSION_NAME": "_my_session_id",
+            "LOGIN_IP_RATE": "0",
+            "LOGIN_EMAIL_RATE": "0",
+        },
+    },
+    "user": {
+        "paths": ["0x03-user_authentication_service"],
+        "env": {"LOGIN_IP_RATE": "0", "LOGIN_EMAIL_RATE": "0"},
+    },
+}
+DEFAULT_MIX = "login=1,profile=5,list_users=3,create_user=1"
+# (app, seed(count), start(client, email, user_id), {name: operation})
+Service = Tuple[object, Callable, Callable, Dict[str, Callable]]
+
+
+class InProcessClient:
+    """
+    Sends requests through the Flask test client, keeping cookies.
+    """
+
+    def __init__(self, app) -> None:
+        """Create a test client for the app."""
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, headers: dict = None,
+                form: dict = None, json_body: dict = None) -> int:
+        """Send a request and return its status code."""
+        response = self._client.open(
+            path, method=method, headers=headers, data=form, json=json_body
+        )
+        response.close()
+        return response.status_code
+
+
+class HttpClient:
+    """
+    Sends requests over HTTP with a persistent connection and a minimal
+    cookie jar.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """Open a connection to the server."""
+        self._connection = http.client.HTTPConnection(host, port)
+        self._cookies = {}
+
+    def request(self, method: str, path: str, headers: dict = None,
+                form: dict = None, json_body: dict = None) -> int:
+        """Send a request and return its status code."""
+        headers = dict(headers or {})
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            body = json.dumps(json_body)
+            headers["Content-Type"] = "application/json"
+        if self._cookies:
+            headers["Cookie"] = "; ".join(
+                "{}={}".format(k, v) for k, v in self._cookies.items()
+            )
+        try:
+            self._connection.request(method, path, body, headers)
+            response = self._connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self._connection.close()
+            raise
+        for header in response.msg.get_all("Set-Cookie") or []:
+            name, _, value = header.split(";", 1)[0].partition("=")
+            self._cookies[name.strip()] = value.strip()
+        if response.will_close:
+            self._connection.close()
+        return response.status
+
+
+def _basic_header(email: str) -> dict:
+    """Build the Authorization header of a seeded user."""
+    token = base64.b64encode("{}:{}".format(email, PASSWORD).encode())
+    return {"Authorization": "Basic " + token.decode()}
+
+
+def _new_email() -> str:
+    """Return an email that was never registered."""
+    return "new-{}@load.test".format(uuid.uuid4().hex)
+
+
+def _seed_models(count: int) -> List[Tuple[str, str]]:
+    """Create users in the Base object store of the 0x01/0x02 APIs."""
+    from models.user import User
+    users = []
+    for i in range(count):
+        user = User(email="user{}@load.test".format(i))
+        user.password = PASSWORD
+        users.append(user)
+    User.save_many(users)
+    return [(user.email, user.id) for user in users]
+
+
+def basic_service() -> Service:
+    """Return the app, seeding, worker start and operations of the
+    Basic authentication API."""
+    from api.v1.app import app
+
+    def start(client, email, user_id):
+        return {"headers": _basic_header(email), "id": user_id}
+
+    operations = {
+        "profile": lambda c, s: c.request(
+            "GET", "/api/v1/users/" + s["id"], s["headers"]),
+        "list_users": lambda c, s: c.request(
+            "GET", "/api/v1/users", s["headers"]),
+        "create_user": lambda c, s: c.request(
+            "POST", "/api/v1/users", s["headers"],
+            json_body={"email": _new_email(), "password": PASSWORD}),
+    }
+    return app, _seed_models, start, operations
+
+
+def session_service() -> Service:
+    """Return the app, seeding, worker start and operations of the
+    Session authentication API."""
+    from api.v1.app import app
+
+    def login(client, state):
+        return client.request(
+            "POST", "/api/v1/auth_session/login",
+            form={"email": state["email"], "password": PASSWORD})
+
+    def start(client, email, user_id):
+        state = {"email": email}
+        login(client, state)
+        return state
+
+    operations = {
+        "login": login,
+        "profile": lambda c, s: c.request("GET", "/api/v1/users/me"),
+        "list_users": lambda c, s: c.request("GET", "/api/v1/users"),
+        "create_user": lambda c, s: c.request(
+            "POST", "/api/v1/users",
+            json_body={"email": _new_email(), "password": PASSWORD}),
+    }
+    return app, _seed_models, start, operations
+
+
+def user_service() -> Service:
+    """Return the app, seeding, worker start and operations of the
+    user authentication service."""
+    from app import app, AUTH
+
+    def seed(count):
+        records = [{"email": "user{}@load.test".format(i),
+                    "password": PASSWORD} for i in range(count)]
+        AUTH.register_users(records)
+        AUTH.teardown()
+        return [(record["email"], None) for record in records]
+
+    def login(client, state):
+        return client.request(
+            "POST", "/sessions",
+            form={"email": state["email"], "password": PASSWORD})
+
+    def start(client, email, user_id):
+        state = {"email": email}
+        login(client, state)
+        return state
+
+    operations = {
+        "login": login,
+        "profile": lambda c, s: c.request("GET", "/profile"),
+        "create_user": lambda c, s: c.request(
+            "POST", "/users",
+            form={"email": _new_email(), "password": PASSWORD}),
+    }
+    return app, seed, start, operations
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values)))
+                                     - 1))
+    return values[index]
+
+
+def run_level(make_client: Callable, start: Callable,
+              operations: Dict[str, Callable], mix: Dict[str, float],
+              users: List[Tuple[str, str]], concurrency: int,
+              duration: float) -> dict:
+    """
+    Drive the mixed workload from `concurrency` threads for `duration`
+    seconds.
+
+    A request fails when it raises or answers with a status of 400 or
+    more, the expected rejections included: every operation of the mix
+    is meant to succeed for a seeded user.
+
+    Returns:
+        dict: Requests/s, errors, failures by status and latency
+        percentiles per endpoint.
+    """
+    names = [name for name in mix if name in operations]
+    weights = [mix[name] for name in names]
+    samples = [[] for _ in range(concurrency)]
+    deadline = [0.0]
+
+    def open_run():
+        """Start the clock once every worker is ready."""
+        deadline[0] = time.perf_counter() + duration
+
+    barrier = threading.Barrier(concurrency + 1, action=open_run)
+
+    def worker(index):
+        """Send requests until the deadline."""
+        rng = random.Random(index)
+        client = make_client()
+        email, user_id = users[index % len(users)]
+        state = start(client, email, user_id)
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            name = rng.choices(names, weights)[0]
+            begin = time.perf_counter()
+            try:
+                status = str(operations[name](client, state))
+            except Exception as e:
+                status = type(e).__name__
+            samples[index].append((name, time.perf_counter() - begin,
+                                   status))
+
+    threads = [threading.Thread(target=worker, args=(i,))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    began = deadline[0] - duration
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    endpoints = {}
+    for name in names:
+        latencies = sorted(s[1] for w in samples for s in w if s[0] == name)
+        failures = {}
+        for status in (s[2] for w in samples for s in w if s[0] == name):
+            if not status.isdigit() or int(status) >= 400:
+                failures[status] = failures.get(status, 0) + 1
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": sum(failures.values()),
+            "failures": failures,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+    return {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "rps": sum(e["requests"] for e in endpoints.values()) / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+def run_service(args: argparse.Namespace) -> dict:
+    """
+    Run every concurrency level against one service in this process.
+    """
+    config = SERVICES[args.service]
+    os.environ.update(config["env"])
+    for path in reversed(config["paths"]):
+        sys.path.insert(0, os.path.join(ROOT, path))
+    os.chdir(tempfile.mkdtemp(prefix="load-test-"))
+    factory = {"basic": basic_service, "session": session_service,
+               "user": user_service}[args.service]
+    app, seed, start, operations = factory()
+    users = seed(args.users)
+    server = None
+    if args.mode == "wsgi":
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def make_client():
+            return HttpClient("127.0.0.1", server.server_port)
+    else:
+        def make_client():
+            return InProcessClient(app)
+    mix = dict(
+        (name, float(weight)) for name, _, weight in
+        (item.partition("=") for item in args.mix.split(",") if item)
+    )
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(make_client, start, operations, mix, users,
+                          concurrency, args.duration)
+        levels.append(level)
+        print_level(args.service, level)
+    if server is not None:
+        server.shutdown()
+    return {
+        "service": args.service,
+        "mode": args.mode,
+        "users": args.users,
+        "duration": args.duration,
+        "mix": mix,
+        "levels": levels,
+    }
+
+
+def print_level(service: str, level: dict) -> None:
+    """Print one concurrency level as a table."""
+    print("{} c={} {:.1f} req/s".format(
+        service, level["concurrency"], level["rps"]), file=sys.stderr)
+    for name, stats in sorted(level["endpoints"].items()):
+        print("  {:<12} {:>8.1f}/s  p50 {:>8.2f}ms  p95 {:>8.2f}ms  "
+              "p99 {:>8.2f}ms  errors {}{}".format(
+                  name, stats["rps"], stats["p50_ms"], stats["p95_ms"],
+                  stats["p99_ms"], stats["errors"],
+                  "".join(" {}x{}".format(count, status) for status, count
+                          in sorted(stats["failures"].items()))),
+              file=sys.stderr)
+
+
+def main() -> None:
+    """Parse the arguments and run the requested services."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--service", default="all",
+                        choices=sorted(SERVICES) + ["all"])
+    parser.add_argument("--mode", default="inprocess",
+                        choices=["inprocess", "wsgi"])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32,64",
+                        type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--output", default="load_test_results.json")
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output)
+    if args.service != "all":
+        results = [run_service(args)]
+    else:
+        results = []
+        for service in sorted(SERVICES):
+            with tempfile.NamedTemporaryFile(suffix=".json") as output:
+                command = [sys.executable, os.path.abspath(__file__)]
+                command += sys.argv[1:]
+                command += ["--service", service, "--output", output.name]
+                subprocess.run(command, check=True)
+                results.extend(json.load(output)["results"])
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Import-time checks of the authentication services.
+
+Importing an app must stay cheap: it imports only the selected auth
+backend, loads no object store and starts no thread. Those checks do not
+depend on timing. On top of them, import_time.py is run for every service
+with the budget it is held to; the budgets leave about twice the
+measured import time as room, and IMPORT_BUDGET_SCALE multiplies them on
+slower machines.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from import_time import ROOT, SERVICES
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "import_time.py")
+BUDGET_MS = {
+    "basic": 400,
+    "session": 400,
+    "session_db": 400,
+    "user": 900,
+}
+# Modules of the auth backends an app may select with AUTH_TYPE.
+BACKEND_MODULES = {
+    "api.v1.auth.auth",
+    "api.v1.auth.basic_auth",
+    "api.v1.auth.session_auth",
+    "api.v1.auth.session_exp_auth",
+    "api.v1.auth.session_db_auth",
+    "api.v1.auth.session_token_auth",
+}
+# The backend modules each app imports: its backend and its bases.
+EXPECTED_BACKENDS = {
+    "basic": {"api.v1.auth.auth", "api.v1.auth.basic_auth"},
+    "session": {"api.v1.auth.auth", "api.v1.auth.session_auth"},
+    "session_db": {"api.v1.auth.auth", "api.v1.auth.session_auth",
+                   "api.v1.auth.session_exp_auth",
+                   "api.v1.auth.session_db_auth"},
+    "user": set(),
+}
+PROBE = """
+import json
+import sys
+import threading
+import {module}
+try:
+    from models.base import LOADED
+except ImportError:
+    LOADED = set()
+print(json.dumps({{
+    "modules": sorted(sys.modules),
+    "loaded": sorted(LOADED),
+    "threads": sorted(t.name for t in threading.enumerate()),
+}}))
+"""
+
+
+def probe(service: str) -> dict:
+    """
+    Import the app of a service in a fresh interpreter.
+
+    Args:
+        service (str): A key of SERVICES.
+
+    Returns:
+        dict: The imported modules, the loaded stores and the threads
+        running once the app is imported.
+    """
+    config = SERVICES[service]
+    env = dict(os.environ, **config["env"])
+    env["PYTHONPATH"] = os.pathsep.join(
+        os.path.join(ROOT, path) for path in config["paths"]
+    )
+    with tempfile.TemporaryDirectory(prefix="import-probe-") as cwd:
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=config["module"])],
+            cwd=cwd, env=env, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError("importing {} failed:\n{}".format(
+            service, result.stderr[-2000:]))
+    return json.loads(result.stdout)
+
+
+class TestImportSideEffects(unittest.TestCase):
+    """
+    Check that importing an app does no work meant for first use.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Import every app once.
+        """
+        cls.reports = {service: probe(service) for service in SERVICES}
+
+    def test_only_selected_backend(self) -> None:
+        """
+        Import the selected auth backend, not the unused ones.
+        """
+        for service, report in sorted(self.reports.items()):
+            with self.subTest(service=service):
+                imported = BACKEND_MODULES.intersection(report["modules"])
+                self.assertEqual(imported, EXPECTED_BACKENDS[service])
+
+    def test_no_store_loaded(self) -> None:
+        """
+        Leave the object stores, User included, to warmup or first use.
+        """
+        for service, report in sorted(self.reports.items()):
+            with self.subTest(service=service):
+                self.assertEqual(report["loaded"], [])
+
+    def test_no_thread_started(self) -> None:
+        """
+        Start no background thread when the app is imported.
+        """
+        for service, report in sorted(self.reports.items()):
+            with self.subTest(service=service):
+                self.assertEqual(report["threads"], ["MainThread"])
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Check that every app imports within its budget.
+    """
+
+    def test_budgets(self) -> None:
+        """
+        Profile each service and fail when it is over its budget.
+        """
+        try:
+            scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+        except ValueError:
+            scale = 1.0
+        for service, budget_ms in sorted(BUDGET_MS.items()):
+            with self.subTest(service=service):
+                result = subprocess.run(
+                    [sys.executable, SCRIPT, "--service", service,
+                     "--runs", "3", "--top", "5",
+                     "--budget-ms", str(budget_ms * scale)],
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    universal_newlines=True,
+                )
+                self.assertEqual(result.returncode, 0, result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()